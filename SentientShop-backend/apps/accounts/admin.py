@@ -1,4 +1,18 @@
 from django.contrib import admin
+from .authentication import invalidate_cached_user
 from .models import User
 
-admin.site.register(User)
+@admin.register(User)
+class UserAdmin(admin.ModelAdmin):
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_cached_user(obj.id)
+
+    def delete_model(self, request, obj):
+        invalidate_cached_user(obj.id)
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for user_id in queryset.values_list("id", flat=True):
+            invalidate_cached_user(user_id)
+        super().delete_queryset(request, queryset)
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# What permission checks and views read from request.user; never the password hash or profile details.
+CACHED_USER_FIELDS = ["id", "email", "role", "is_staff", "is_superuser", "is_active"]
+
+
+def _user_cache_key(user_id):
+    return f"auth:identity:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    transaction.on_commit(lambda: cache.delete(_user_cache_key(user_id)))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    # Only active users are cached; any change to a user must call invalidate_cached_user.
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        key = _user_cache_key(user_id)
+        entry = cache.get(key)
+        if entry is None:
+            user = super().get_user(validated_token)
+            cache.set(key, self._cache_entry(user), settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != entry.get(
+            "password_fingerprint"
+        ):
+            raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+        return self._user_from_entry(entry)
+
+    def _cache_entry(self, user):
+        entry = {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # The same digest the token carries, so revoked tokens are refused without caching the hash itself.
+            entry["password_fingerprint"] = get_md5_hash_password(user.password)
+        return entry
+
+    def _user_from_entry(self, entry):
+        # The remaining fields are deferred, so a view that reads one loads it from the database.
+        # from_db() pairs partial values with fields in model order, whatever order field_names is in.
+        field_names = [
+            field.attname for field in self.user_model._meta.concrete_fields if field.attname in CACHED_USER_FIELDS
+        ]
+        return self.user_model.from_db(
+            router.db_for_read(self.user_model), field_names, [entry[name] for name in field_names]
+        )
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import BaseUserManager
 
 class UserManager(BaseUserManager):
@@ -51,5 +52,12 @@ class User(AbstractUser):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(Lower("email"), name="user_email_lower_idx"),
+            models.Index(Lower("username"), name="user_username_lower_idx"),
+            models.Index(fields=["role", "-id"], name="user_role_recent_idx"),
+        ]
+
     def __str__(self):
         return self.email
\ No newline at end of file
@@ -66,6 +66,14 @@ class AdminUserSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "is_superuser", "last_login"]
 
 
+class AdminUserStatsSerializer(AdminUserSerializer):
+    order_count = serializers.IntegerField(read_only=True)
+    lifetime_spend = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta(AdminUserSerializer.Meta):
+        fields = AdminUserSerializer.Meta.fields + ["order_count", "lifetime_spend"]
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
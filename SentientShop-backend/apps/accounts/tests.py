@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import CACHED_USER_FIELDS, _user_cache_key
+from .models import User
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _client(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        return client
+
+    def test_cache_holds_only_the_permission_fields(self):
+        user = User.objects.create_user(email="shopper@example.com", username="shopper", password="pw123456")
+        self._client(user).get("/api/cart/")
+
+        self.assertEqual(set(cache.get(_user_cache_key(user.id))), set(CACHED_USER_FIELDS))
+
+    def test_cached_user_keeps_role_checks(self):
+        customer = User.objects.create_user(email="shopper@example.com", username="shopper", password="pw123456")
+        admin = User.objects.create_user(email="admin@example.com", username="admin", password="pw123456", role="ADMIN")
+        customer_client = self._client(customer)
+        admin_client = self._client(admin)
+
+        # The second request of each pair authenticates from the cache.
+        for _ in range(2):
+            self.assertEqual(customer_client.get("/api/auth/admin/users/").status_code, 403)
+            self.assertEqual(admin_client.get("/api/auth/admin/users/").status_code, 200)
+
+    def test_profile_reads_fields_outside_the_cache(self):
+        user = User.objects.create_user(
+            email="shopper@example.com", username="shopper", password="pw123456", first_name="Asha"
+        )
+        client = self._client(user)
+        client.get("/api/cart/")
+
+        with self.assertNumQueries(1):
+            response = client.get("/api/auth/me/")
+        self.assertEqual((response.data["username"], response.data["first_name"]), ("shopper", "Asha"))
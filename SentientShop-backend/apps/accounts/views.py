@@ -1,15 +1,26 @@
+from django.db.models import Count, DecimalField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Lower
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import ListAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework import status
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from apps.carts.sessions import guest_cart_from_request, merge_guest_cart
+from apps.orders.models import Order
+from core.instrumentation import TimedSerializerMixin, serializer_data
+from core.pagination import IdCursorPagination
 from core.permissions import IsAdminRole
 
+from .authentication import invalidate_cached_user
 from .models import User
 from .serializers import (
     AdminUserSerializer,
+    AdminUserStatsSerializer,
     ChangePasswordSerializer,
     CustomTokenObtainPairSerializer,
     LoginSerializer,
@@ -25,6 +36,7 @@ class RegisterView(APIView):
         serializer = RegisterSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
+        merge_guest_cart(user, guest_cart_from_request(request))
 
         refresh = RefreshToken.for_user(user)
 
@@ -56,13 +68,80 @@ class LoginView(APIView):
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as exc:
+            raise InvalidToken(exc.args[0])
+
+        merge_guest_cart(serializer.user, guest_cart_from_request(request))
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
+
+TRUE_VALUES = {"1", "true", "yes"}
+FALSE_VALUES = {"0", "false", "no"}
+
+
+def _prefix_filter(field, prefix):
+    # The range lets the Lower() indexes serve the lookup; startswith keeps the match exact.
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f"{field}__gte": prefix, f"{field}__lt": upper, f"{field}__startswith": prefix})
+
+
+def _search_users(users, query):
+    prefix = query.strip().lower()
+    if not prefix:
+        return users
+    return users.annotate(email_lower=Lower("email"), username_lower=Lower("username")).filter(
+        _prefix_filter("email_lower", prefix) | _prefix_filter("username_lower", prefix)
+    )
+
 
-class AdminUserListView(APIView):
+def _with_order_stats(users):
+    orders = Order.objects.filter(user=OuterRef("pk")).order_by().values("user")
+    purchased = orders.filter(status__in=Order.PURCHASED_STATUSES)
+    return users.annotate(
+        order_count=Coalesce(Subquery(orders.annotate(count=Count("id")).values("count")), 0),
+        lifetime_spend=Coalesce(
+            Subquery(purchased.annotate(total=Sum("total_amount")).values("total")),
+            Value(0),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        ),
+    )
+
+
+class AdminUserListView(TimedSerializerMixin, ListAPIView):
     permission_classes = [IsAdminRole]
+    pagination_class = IdCursorPagination
 
-    def get(self, request):
-        users = User.objects.all().order_by("-id")
-        return Response(AdminUserSerializer(users, many=True).data)
+    def _include_stats(self):
+        return self.request.query_params.get("stats", "").lower() in TRUE_VALUES
+
+    def get_serializer_class(self):
+        return AdminUserStatsSerializer if self._include_stats() else AdminUserSerializer
+
+    def get_queryset(self):
+        params = self.request.query_params
+        users = _search_users(User.objects.all(), params.get("q", ""))
+
+        role = params.get("role")
+        if role:
+            roles = {value.strip().upper() for value in role.split(",")}
+            allowed_roles = {choice[0] for choice in User.ROLE_CHOICES}
+            if roles - allowed_roles:
+                raise ValidationError({"error": "Invalid role", "allowed": sorted(allowed_roles)})
+            users = users.filter(role__in=roles)
+
+        is_active = params.get("is_active", "").lower()
+        if is_active:
+            if is_active not in TRUE_VALUES | FALSE_VALUES:
+                raise ValidationError({"error": "is_active must be true or false"})
+            users = users.filter(is_active=is_active in TRUE_VALUES)
+
+        if self._include_stats():
+            users = _with_order_stats(users)
+        return users
 
 
 class AdminUserUpdateView(APIView):
@@ -77,20 +156,26 @@ class AdminUserUpdateView(APIView):
         serializer = AdminUserSerializer(user, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        return Response(serializer.data)
+        invalidate_cached_user(user.id)
+        return Response(serializer_data(serializer))
 
 
 class ProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
+    def get_object(self, request):
+        # request.user may be the cached subset from CachedJWTAuthentication; the profile needs every field.
+        return User.objects.get(pk=request.user.pk)
+
     def get(self, request):
-        return Response(UserProfileSerializer(request.user).data)
+        return Response(serializer_data(UserProfileSerializer(self.get_object(request))))
 
     def patch(self, request):
-        serializer = UserProfileSerializer(request.user, data=request.data, partial=True)
+        serializer = UserProfileSerializer(self.get_object(request), data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        return Response(serializer.data)
+        invalidate_cached_user(request.user.id)
+        return Response(serializer_data(serializer))
 
 
 class ChangePasswordView(APIView):
@@ -105,4 +190,5 @@ class ChangePasswordView(APIView):
 
         request.user.set_password(serializer.validated_data["new_password"])
         request.user.save(update_fields=["password"])
+        invalidate_cached_user(request.user.id)
         return Response({"detail": "Password updated successfully."})
@@ -0,0 +1,39 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from .models import DailySalesRollup
+
+
+def sales_summary(start=None, end=None):
+    rollups = DailySalesRollup.objects.order_by("day", "status")
+    if start:
+        rollups = rollups.filter(day__gte=start)
+    if end:
+        rollups = rollups.filter(day__lte=end)
+
+    status_counts = defaultdict(int)
+    orders_by_day = defaultdict(int)
+    revenue_by_day = []
+    paid_revenue = Decimal("0")
+    for rollup in rollups:
+        status_counts[rollup.status] += rollup.order_count
+        orders_by_day[rollup.day] += rollup.order_count
+        if rollup.status == "PAID" and rollup.order_count:
+            paid_revenue += rollup.revenue
+            revenue_by_day.append({"date": rollup.day, "revenue": float(rollup.revenue)})
+
+    return {
+        "metrics": {
+            "total_orders": sum(status_counts.values()),
+            "paid_orders": status_counts["PAID"],
+            "pending_orders": status_counts["PENDING"],
+            "total_revenue": paid_revenue,
+        },
+        "revenue_summary": [
+            {"status": status, "count": count} for status, count in sorted(status_counts.items()) if count
+        ],
+        "charts": {
+            "revenue_by_day": revenue_by_day,
+            "orders_by_day": [{"date": day, "orders": count} for day, count in orders_by_day.items() if count],
+        },
+    }
@@ -0,0 +1,78 @@
+import math
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, FloatField, Q, Sum
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from apps.orders.models import Order, OrderItem
+
+from .models import VariantSalesVelocity
+
+SHORT_WINDOW_DAYS = 7
+LONG_WINDOW_DAYS = 30
+
+
+@transaction.atomic
+def compute_sales_velocity(now=None):
+    now = now or timezone.now()
+    short_start = now - timedelta(days=SHORT_WINDOW_DAYS)
+    rows = (
+        OrderItem.objects.filter(
+            order__status__in=Order.PURCHASED_STATUSES,
+            order__created_at__gte=now - timedelta(days=LONG_WINDOW_DAYS),
+            order__created_at__lt=now,
+        )
+        .values("variant_id")
+        .annotate(
+            units_7d=Sum("quantity", filter=Q(order__created_at__gte=short_start), default=0),
+            units_30d=Sum("quantity"),
+        )
+        .order_by()
+    )
+
+    VariantSalesVelocity.objects.all().delete()
+    return len(
+        VariantSalesVelocity.objects.bulk_create(
+            (
+                VariantSalesVelocity(
+                    variant_id=row["variant_id"],
+                    units_7d=row["units_7d"],
+                    units_30d=row["units_30d"],
+                    # The faster of the two windows, so a recent spike shortens cover straight away.
+                    daily_velocity=max(row["units_7d"] / SHORT_WINDOW_DAYS, row["units_30d"] / LONG_WINDOW_DAYS),
+                    computed_at=now,
+                )
+                for row in rows.iterator()
+            ),
+            batch_size=5000,
+        )
+    )
+
+
+def low_stock_report(cover_days, target_days, limit):
+    velocities = (
+        VariantSalesVelocity.objects.filter(
+            daily_velocity__gt=0, variant__stock__lt=F("daily_velocity") * cover_days
+        )
+        .annotate(days_of_cover=Cast("variant__stock", FloatField()) / F("daily_velocity"))
+        .select_related("variant__product")
+        .order_by("days_of_cover", "variant_id")[:limit]
+    )
+    return [
+        {
+            "variant_id": velocity.variant_id,
+            "product_id": velocity.variant.product_id,
+            "product": velocity.variant.product.name,
+            "size": velocity.variant.size,
+            "color": velocity.variant.color,
+            "stock": velocity.variant.stock,
+            "units_7d": velocity.units_7d,
+            "units_30d": velocity.units_30d,
+            "daily_velocity": round(velocity.daily_velocity, 2),
+            "days_of_cover": round(velocity.days_of_cover, 1),
+            "reorder_quantity": max(math.ceil(velocity.daily_velocity * target_days) - velocity.variant.stock, 0),
+        }
+        for velocity in velocities
+    ]
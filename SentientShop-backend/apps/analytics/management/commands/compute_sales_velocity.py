@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.analytics.inventory import compute_sales_velocity
+
+
+class Command(BaseCommand):
+    help = "Recompute per-variant sales velocity over the last 7 and 30 days for the low-stock report."
+
+    def handle(self, *args, **options):
+        computed = compute_sales_velocity()
+        self.stdout.write(self.style.SUCCESS(f"Computed sales velocity for {computed} variants"))
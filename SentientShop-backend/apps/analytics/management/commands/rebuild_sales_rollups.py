@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.analytics.queries import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily sales rollups from the full order history."
+
+    def handle(self, *args, **options):
+        created = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} daily rollup rows"))
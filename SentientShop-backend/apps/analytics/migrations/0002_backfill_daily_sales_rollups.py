@@ -0,0 +1,38 @@
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    Order = apps.get_model("orders", "Order")
+    DailySalesRollup = apps.get_model("analytics", "DailySalesRollup")
+
+    rows = (
+        Order.objects.annotate(day=TruncDate("created_at"))
+        .values("day", "status")
+        .annotate(order_count=Count("id"), revenue=Sum("total_amount"))
+        .order_by()
+    )
+    DailySalesRollup.objects.bulk_create(
+        [
+            DailySalesRollup(
+                day=row["day"],
+                status=row["status"],
+                order_count=row["order_count"],
+                revenue=row["revenue"] or 0,
+            )
+            for row in rows
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0001_initial"),
+        ("orders", "0003_stripeevent"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
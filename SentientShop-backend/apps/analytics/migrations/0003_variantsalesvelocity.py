@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-18 12:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0002_backfill_daily_sales_rollups"),
+        ("store", "0007_seed_stock_snapshots"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VariantSalesVelocity",
+            fields=[
+                (
+                    "variant",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="sales_velocity",
+                        serialize=False,
+                        to="store.productvariant",
+                    ),
+                ),
+                ("units_7d", models.PositiveIntegerField(default=0)),
+                ("units_30d", models.PositiveIntegerField(default=0)),
+                ("daily_velocity", models.FloatField(default=0)),
+                ("computed_at", models.DateTimeField()),
+            ],
+        ),
+    ]
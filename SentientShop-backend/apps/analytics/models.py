@@ -0,0 +1,33 @@
+from django.db import models
+
+from apps.orders.models import Order
+from apps.store.models import ProductVariant
+
+
+class DailySalesRollup(models.Model):
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    order_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "status"], name="unique_rollup_per_day_status"),
+        ]
+        ordering = ["day", "status"]
+
+    def __str__(self):
+        return f"{self.day} {self.status}: {self.order_count} orders"
+
+
+class VariantSalesVelocity(models.Model):
+    variant = models.OneToOneField(
+        ProductVariant, on_delete=models.CASCADE, primary_key=True, related_name="sales_velocity"
+    )
+    units_7d = models.PositiveIntegerField(default=0)
+    units_30d = models.PositiveIntegerField(default=0)
+    daily_velocity = models.FloatField(default=0)
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Variant {self.variant_id}: {self.daily_velocity:.2f}/day"
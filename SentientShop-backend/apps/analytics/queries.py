@@ -0,0 +1,78 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.orders.models import Order
+
+from .models import DailySalesRollup
+
+
+def _apply_delta(day, status, order_count, revenue):
+    rollup = DailySalesRollup.objects.filter(day=day, status=status)
+    changes = {"order_count": F("order_count") + order_count, "revenue": F("revenue") + revenue}
+    if rollup.update(**changes):
+        return
+
+    try:
+        with transaction.atomic():
+            DailySalesRollup.objects.create(day=day, status=status, order_count=order_count, revenue=revenue)
+    except IntegrityError:
+        rollup.update(**changes)
+
+
+def record_transitions(transitions):
+    # transitions: (created_at, total_amount, old_status, new_status); old_status is None for new orders.
+    deltas = defaultdict(lambda: [0, Decimal("0")])
+    for created_at, total_amount, old_status, new_status in transitions:
+        if old_status == new_status:
+            continue
+
+        day = timezone.localdate(created_at)
+        if old_status:
+            deltas[(day, old_status)][0] -= 1
+            deltas[(day, old_status)][1] -= total_amount
+        deltas[(day, new_status)][0] += 1
+        deltas[(day, new_status)][1] += total_amount
+
+    changes = [(key, delta) for key, delta in sorted(deltas.items()) if delta[0] or delta[1]]
+    if changes:
+        # Every checkout touches the same (today, PENDING) row, so its lock is only taken after the caller commits.
+        transaction.on_commit(lambda: _apply_deltas(changes))
+
+
+@transaction.atomic
+def _apply_deltas(changes):
+    for (day, status), (order_count, revenue) in changes:
+        _apply_delta(day, status, order_count, revenue)
+
+
+def record_status_change(order, old_status):
+    record_transitions([(order.created_at, order.total_amount, old_status, order.status)])
+
+
+@transaction.atomic
+def rebuild_rollups():
+    rows = (
+        Order.objects.annotate(day=TruncDate("created_at"))
+        .values("day", "status")
+        .annotate(order_count=Count("id"), revenue=Sum("total_amount"))
+        .order_by()
+    )
+    DailySalesRollup.objects.all().delete()
+    return len(
+        DailySalesRollup.objects.bulk_create(
+            [
+                DailySalesRollup(
+                    day=row["day"],
+                    status=row["status"],
+                    order_count=row["order_count"],
+                    revenue=row["revenue"] or 0,
+                )
+                for row in rows
+            ]
+        )
+    )
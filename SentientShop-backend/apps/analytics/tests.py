@@ -0,0 +1,150 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.carts.models import CartItem
+from apps.orders.models import Order, OrderItem, StripeEvent
+from apps.orders.payments import cancel_order, place_order, release_expired_reservations, set_order_status
+from apps.orders.tasks import process_pending_events
+from apps.store.models import Product, ProductVariant
+
+from .dashboard import sales_summary
+from .inventory import compute_sales_velocity, low_stock_report
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        product = Product.objects.create(name="Water bottle", description="")
+        self.variant = ProductVariant.objects.create(
+            product=product, size="L", color="steel", price=Decimal("350.00"), stock=100
+        )
+
+    def _place(self, index, quantity):
+        user = User.objects.create(email=f"rollup{index}@example.com", username=f"rollup{index}")
+        CartItem.objects.create(user=user, variant=self.variant, quantity=quantity)
+        with self.captureOnCommitCallbacks(execute=True):
+            return place_order(user)
+
+    def _refund(self, order):
+        StripeEvent.objects.create(
+            event_id=f"evt_refund_{order.id}",
+            type="charge.refunded",
+            payload={
+                "data": {
+                    "object": {"object": "charge", "refunded": True, "metadata": {"order_id": str(order.id)}}
+                }
+            },
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            process_pending_events()
+
+    def _live_summary(self):
+        rows = Order.objects.values("status").annotate(count=Count("id"), revenue=Sum("total_amount")).order_by()
+        counts = defaultdict(int, {row["status"]: row["count"] for row in rows})
+        revenue = {row["status"]: row["revenue"] for row in rows}
+        return {
+            "total_orders": sum(counts.values()),
+            "paid_orders": counts["PAID"],
+            "pending_orders": counts["PENDING"],
+            "total_revenue": revenue.get("PAID", Decimal("0")),
+        }, [{"status": status, "count": count} for status, count in sorted(counts.items())]
+
+    def test_rollups_match_live_orders_after_pay_refund_and_cancel(self):
+        paid, refunded, cancelled, expired, pending = [self._place(index, index + 1) for index in range(5)]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            set_order_status(paid, "PAID")
+            set_order_status(refunded, "PAID")
+            cancel_order(cancelled)
+        self._refund(refunded)
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.filter(id=expired.id).update(reserved_until=timezone.now() - timedelta(minutes=1))
+            release_expired_reservations()
+
+        self.assertEqual(
+            dict(Order.objects.values_list("id", "status")),
+            {
+                paid.id: "PAID",
+                refunded.id: "CANCELLED",
+                cancelled.id: "CANCELLED",
+                expired.id: "CANCELLED",
+                pending.id: "PENDING",
+            },
+        )
+        summary = sales_summary()
+        metrics, revenue_summary = self._live_summary()
+        self.assertEqual(summary["metrics"], metrics)
+        self.assertEqual(summary["revenue_summary"], revenue_summary)
+        self.assertEqual(
+            summary["charts"]["revenue_by_day"],
+            [{"date": timezone.localdate(paid.created_at), "revenue": float(paid.total_amount)}],
+        )
+
+
+class LowStockReportTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.admin = User.objects.create(email="stock@example.com", username="stock", role="ADMIN")
+        product = Product.objects.create(name="Running sock", description="")
+        self.fast = self._variant(product, "S", stock=5)
+        self.steady = self._variant(product, "M", stock=20)
+        # fast: 14 units this week, so 2/day from the 7-day window and 2.5 days of cover.
+        self._sell(self.fast, 14, days_ago=2)
+        # steady: 30 units three weeks ago, so 1/day from the 30-day window and 20 days of cover.
+        self._sell(self.steady, 30, days_ago=20)
+        # Outside the 30-day window, and cancelled: neither counts.
+        self._sell(self.steady, 100, days_ago=45)
+        self._sell(self.fast, 100, days_ago=1, status="CANCELLED")
+        compute_sales_velocity(self.now)
+
+    def _variant(self, product, size, stock):
+        return ProductVariant.objects.create(
+            product=product, size=size, color="grey", price=Decimal("99.00"), stock=stock
+        )
+
+    def _sell(self, variant, quantity, days_ago, status="PAID"):
+        order = Order.objects.create(user=self.admin, total_amount=variant.price * quantity, status=status)
+        OrderItem.objects.create(order=order, variant=variant, quantity=quantity, price=variant.price)
+        Order.objects.filter(id=order.id).update(created_at=self.now - timedelta(days=days_ago))
+
+    def test_velocity_cover_and_reorder_quantity(self):
+        report = low_stock_report(cover_days=14, target_days=30, limit=50)
+
+        self.assertEqual(len(report), 1)
+        row = report[0]
+        self.assertEqual(row["variant_id"], self.fast.id)
+        self.assertEqual((row["units_7d"], row["units_30d"]), (14, 14))
+        self.assertEqual(row["daily_velocity"], 2.0)
+        self.assertEqual(row["days_of_cover"], 2.5)
+        self.assertEqual(row["reorder_quantity"], 2 * 30 - 5)
+
+    def test_longer_cover_includes_slower_variants_in_cover_order(self):
+        report = low_stock_report(cover_days=21, target_days=10, limit=50)
+
+        self.assertEqual([row["variant_id"] for row in report], [self.fast.id, self.steady.id])
+        steady = report[1]
+        self.assertEqual((steady["units_7d"], steady["units_30d"]), (0, 30))
+        self.assertEqual(steady["daily_velocity"], 1.0)
+        self.assertEqual(steady["days_of_cover"], 20.0)
+        # Stock already covers the 10-day target.
+        self.assertEqual(steady["reorder_quantity"], 0)
+
+    def test_view_rejects_invalid_parameters(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        for params in ({"cover_days": "two"}, {"limit": "1.5"}, {"target_days": 0}, {"cover_days": -3}):
+            with self.subTest(params=params):
+                response = client.get("/api/orders/admin/inventory/low-stock/", params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
+
+        response = client.get("/api/orders/admin/inventory/low-stock/", {"cover_days": 21, "limit": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["variant_id"] for row in response.json()["results"]], [self.fast.id])
@@ -0,0 +1,164 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, Sum, Value, When, Window
+from rest_framework.exceptions import ValidationError
+
+from apps.store.models import ProductVariant
+
+from .models import CartItem
+
+CART_OPERATIONS = {"add", "set", "remove"}
+MAX_CART_OPERATIONS = 100
+
+
+def _line_total():
+    return ExpressionWrapper(
+        F("variant__price") * F("quantity"),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def cart_rows(user):
+    return (
+        CartItem.objects.filter(user=user)
+        .annotate(line_total=_line_total(), subtotal=Window(expression=Sum(_line_total())))
+        .values(
+            "id",
+            "variant_id",
+            "variant__product__name",
+            "variant__size",
+            "variant__color",
+            "variant__price",
+            "quantity",
+            "line_total",
+            "subtotal",
+        )
+        .order_by("id")
+    )
+
+
+def get_cart(user):
+    return _format_cart(list(cart_rows(user)))
+
+
+async def aget_cart(user):
+    return _format_cart([row async for row in cart_rows(user)])
+
+
+def _format_cart(rows):
+    subtotal = rows[0]["subtotal"] if rows else Decimal("0")
+
+    return {
+        "items": [
+            {
+                "id": row["id"],
+                "variant": row["variant_id"],
+                "product": row["variant__product__name"],
+                "size": row["variant__size"],
+                "color": row["variant__color"],
+                "price": float(row["variant__price"]),
+                "quantity": row["quantity"],
+                "line_total": float(row["line_total"]),
+            }
+            for row in rows
+        ],
+        "subtotal": float(subtotal),
+    }
+
+
+def _operation_error(index, message):
+    return ValidationError({"error": message, "index": index})
+
+
+def parse_cart_operations(operations):
+    if not isinstance(operations, list) or not operations:
+        raise ValidationError({"error": "operations must be a non-empty list"})
+    if len(operations) > MAX_CART_OPERATIONS:
+        raise ValidationError({"error": f"At most {MAX_CART_OPERATIONS} operations per request"})
+
+    parsed = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise _operation_error(index, "Operation must be an object")
+
+        op = operation.get("op")
+        if op not in CART_OPERATIONS:
+            raise ValidationError({"error": "Invalid op", "index": index, "allowed": sorted(CART_OPERATIONS)})
+
+        try:
+            variant_id = int(operation.get("variant") or operation.get("variant_id"))
+        except (TypeError, ValueError):
+            raise _operation_error(index, "variant is required")
+
+        quantity = 0
+        if op != "remove":
+            try:
+                quantity = int(operation.get("quantity", 1))
+            except (TypeError, ValueError):
+                raise _operation_error(index, "quantity must be a number")
+            if quantity < 1:
+                raise _operation_error(index, "quantity must be at least 1")
+
+        parsed.append((op, variant_id, quantity))
+
+    variant_ids = {variant_id for _, variant_id, _ in parsed}
+    missing = variant_ids - set(ProductVariant.objects.filter(id__in=variant_ids).values_list("id", flat=True))
+    if missing:
+        raise ValidationError({"error": "Invalid variant", "variants": sorted(missing)})
+    return parsed
+
+
+def plan_cart_operations(operations):
+    # variant_id -> (absolute quantity or None to keep the current one, quantity to add on top)
+    plan = {}
+    for op, variant_id, quantity in operations:
+        base, delta = plan.get(variant_id, (None, 0))
+        if op == "add":
+            plan[variant_id] = (base, delta + quantity)
+        elif op == "set":
+            plan[variant_id] = (quantity, 0)
+        else:
+            plan[variant_id] = (0, 0)
+    return plan
+
+
+def apply_guest_cart_plan(items, plan):
+    items = dict(items)
+    for variant_id, (base, delta) in plan.items():
+        quantity = (items.get(variant_id, 0) if base is None else base) + delta
+        if quantity > 0:
+            items[variant_id] = quantity
+        else:
+            items.pop(variant_id, None)
+    return items
+
+
+@transaction.atomic
+def apply_cart_plan(user, plan):
+    removed = [variant_id for variant_id, (base, delta) in plan.items() if base == 0 and not delta]
+    absolute = {variant_id: base + delta for variant_id, (base, delta) in plan.items() if base is not None}
+    added = {variant_id: delta for variant_id, (base, delta) in plan.items() if base is None}
+
+    if removed:
+        CartItem.objects.filter(user=user, variant_id__in=removed).delete()
+
+    absolute = {variant_id: quantity for variant_id, quantity in absolute.items() if quantity > 0}
+    if absolute:
+        CartItem.objects.bulk_create(
+            [CartItem(user=user, variant_id=variant_id, quantity=quantity) for variant_id, quantity in absolute.items()],
+            update_conflicts=True,
+            unique_fields=["user", "variant"],
+            update_fields=["quantity"],
+        )
+
+    if added:
+        # Insert missing lines empty, then add in the database so concurrent adds both count.
+        CartItem.objects.bulk_create(
+            [CartItem(user=user, variant_id=variant_id, quantity=0) for variant_id in sorted(added)],
+            ignore_conflicts=True,
+        )
+        CartItem.objects.filter(user=user, variant_id__in=added).update(
+            quantity=F("quantity")
+            + Case(*[When(variant_id=variant_id, then=Value(delta)) for variant_id, delta in added.items()])
+        )
@@ -0,0 +1,38 @@
+# Generated by Django 5.0 on 2026-10-18 12:10
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_items(apps, schema_editor):
+    CartItem = apps.get_model("carts", "CartItem")
+    duplicates = (
+        CartItem.objects.values("user_id", "variant_id")
+        .annotate(rows=Count("id"), keep_id=Min("id"), total=Sum("quantity"))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        CartItem.objects.filter(id=row["keep_id"]).update(quantity=row["total"])
+        CartItem.objects.filter(user_id=row["user_id"], variant_id=row["variant_id"]).exclude(
+            id=row["keep_id"]
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("carts", "0001_initial"),
+        ("store", "0007_seed_stock_snapshots"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="cartitem",
+            constraint=models.UniqueConstraint(
+                fields=("user", "variant"), name="cart_item_user_variant_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,94 @@
+from decimal import Decimal
+
+from django.core import signing
+
+from apps.store.models import ProductVariant
+
+from .api import apply_cart_plan
+
+GUEST_CART_HEADER = "X-Guest-Cart"
+GUEST_CART_SALT = "carts.guest"
+GUEST_CART_MAX_AGE = 60 * 60 * 24 * 30
+MAX_GUEST_CART_LINES = 100
+
+
+def load_guest_cart(token):
+    if not token:
+        return {}
+    try:
+        data = signing.loads(token, salt=GUEST_CART_SALT, max_age=GUEST_CART_MAX_AGE)
+    except signing.BadSignature:
+        return {}
+    try:
+        items = {int(variant_id): int(quantity) for variant_id, quantity in data.items()}
+    except (AttributeError, TypeError, ValueError):
+        return {}
+    return {variant_id: quantity for variant_id, quantity in items.items() if quantity > 0}
+
+
+def dump_guest_cart(items):
+    return signing.dumps(
+        {str(variant_id): quantity for variant_id, quantity in items.items()},
+        salt=GUEST_CART_SALT,
+        compress=True,
+    )
+
+
+def guest_cart_from_request(request):
+    token = request.headers.get(GUEST_CART_HEADER)
+    if not token and isinstance(request.data, dict):
+        token = request.data.get("guest_cart")
+    return load_guest_cart(token)
+
+
+def _guest_cart_variants(items):
+    return (
+        ProductVariant.objects.filter(id__in=items)
+        .values("id", "product__name", "size", "color", "price")
+        .order_by("id")
+    )
+
+
+def get_guest_cart(items):
+    return _format_guest_cart(items, list(_guest_cart_variants(items)))
+
+
+async def aget_guest_cart(items):
+    return _format_guest_cart(items, [variant async for variant in _guest_cart_variants(items)])
+
+
+def _format_guest_cart(items, variants):
+    lines = []
+    subtotal = Decimal("0")
+    for variant in variants:
+        quantity = items[variant["id"]]
+        line_total = variant["price"] * quantity
+        subtotal += line_total
+        lines.append(
+            {
+                "id": variant["id"],
+                "variant": variant["id"],
+                "product": variant["product__name"],
+                "size": variant["size"],
+                "color": variant["color"],
+                "price": float(variant["price"]),
+                "quantity": quantity,
+                "line_total": float(line_total),
+            }
+        )
+
+    return {
+        "items": lines,
+        "subtotal": float(subtotal),
+        "guest_cart": dump_guest_cart({line["variant"]: line["quantity"] for line in lines}),
+    }
+
+
+def merge_guest_cart(user, items):
+    variant_ids = set(ProductVariant.objects.filter(id__in=items).values_list("id", flat=True))
+    if not variant_ids:
+        return 0
+
+    # Merge as cart adds: the database adds onto whatever line exists, including one a concurrent add just made.
+    apply_cart_plan(user, {variant_id: (None, items[variant_id]) for variant_id in variant_ids})
+    return len(variant_ids)
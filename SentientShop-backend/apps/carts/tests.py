@@ -0,0 +1,189 @@
+import threading
+from decimal import Decimal
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.store.models import Product, ProductVariant
+from core.testing import retry_locked
+
+from .api import apply_cart_plan, apply_guest_cart_plan, plan_cart_operations
+from .models import CartItem
+from .sessions import GUEST_CART_HEADER, dump_guest_cart
+
+
+def _create_variants(count):
+    product = Product.objects.create(name="Desk lamp", description="")
+    return [
+        ProductVariant.objects.create(
+            product=product, size="M", color=f"color{index}", price=Decimal("10.00"), stock=50
+        )
+        for index in range(count)
+    ]
+
+
+class CartReadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(email="shopper@example.com", username="shopper")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _fill_cart(self, lines):
+        CartItem.objects.filter(user=self.user).delete()
+        for index in range(lines):
+            product = Product.objects.create(name=f"Product {index}", description="")
+            variant = ProductVariant.objects.create(
+                product=product, size="M", color="blue", price=Decimal("10.25"), stock=100
+            )
+            CartItem.objects.create(user=self.user, variant=variant, quantity=index + 1)
+
+    def test_cart_read_is_one_query_regardless_of_size(self):
+        for lines in (1, 50):
+            self._fill_cart(lines)
+            with self.assertNumQueries(1):
+                response = self.client.get("/api/cart/")
+
+            data = response.json()
+            self.assertEqual(len(data["items"]), lines)
+            self.assertEqual(data["subtotal"], float(Decimal("10.25") * sum(range(1, lines + 1))))
+
+
+class CartPlanTests(SimpleTestCase):
+    def test_operations_fold_into_one_plan_entry_per_variant(self):
+        plan = plan_cart_operations(
+            [
+                ("add", 1, 2),
+                ("add", 1, 3),
+                ("set", 2, 4),
+                ("add", 2, 1),
+                ("add", 3, 5),
+                ("set", 3, 2),
+                ("remove", 4, 0),
+                ("remove", 5, 0),
+                ("add", 5, 2),
+            ]
+        )
+
+        self.assertEqual(plan, {1: (None, 5), 2: (4, 1), 3: (2, 0), 4: (0, 0), 5: (0, 2)})
+
+    def test_guest_plan_adds_sets_and_removes(self):
+        items = apply_guest_cart_plan(
+            {1: 1, 2: 9, 4: 3},
+            plan_cart_operations([("add", 1, 2), ("set", 2, 4), ("remove", 4, 0), ("add", 6, 1)]),
+        )
+
+        self.assertEqual(items, {1: 3, 2: 4, 6: 1})
+
+
+class CartBatchTests(TestCase):
+    def test_plan_adds_sets_and_removes_in_one_batch(self):
+        user = User.objects.create(email="batch@example.com", username="batch")
+        added, reset, removed, created = _create_variants(4)
+        CartItem.objects.bulk_create(
+            [
+                CartItem(user=user, variant=added, quantity=1),
+                CartItem(user=user, variant=reset, quantity=9),
+                CartItem(user=user, variant=removed, quantity=3),
+            ]
+        )
+
+        plan = plan_cart_operations(
+            [
+                ("add", added.id, 2),
+                ("set", reset.id, 4),
+                ("remove", removed.id, 0),
+                ("add", created.id, 1),
+                ("add", created.id, 1),
+            ]
+        )
+        apply_cart_plan(user, plan)
+
+        self.assertEqual(
+            dict(CartItem.objects.filter(user=user).values_list("variant_id", "quantity")),
+            {added.id: 3, reset.id: 4, created.id: 2},
+        )
+
+
+class GuestCartMergeTests(TestCase):
+    def setUp(self):
+        self.kept, self.added = _create_variants(2)
+        self.client = APIClient()
+
+    def _cart(self, email):
+        return dict(CartItem.objects.filter(user__email=email).values_list("variant_id", "quantity"))
+
+    def test_login_merges_the_guest_cart(self):
+        User.objects.create_user(email="returning@example.com", password="pass12345")
+
+        response = self.client.post(
+            "/api/auth/login/",
+            {"email": "returning@example.com", "password": "pass12345"},
+            format="json",
+            headers={GUEST_CART_HEADER: dump_guest_cart({self.kept.id: 2, self.added.id: 1})},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._cart("returning@example.com"), {self.kept.id: 2, self.added.id: 1})
+
+    def test_register_merges_the_guest_cart(self):
+        response = self.client.post(
+            "/api/auth/register/",
+            {
+                "email": "new@example.com",
+                "password": "pass12345",
+                "guest_cart": dump_guest_cart({self.added.id: 3}),
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self._cart("new@example.com"), {self.added.id: 3})
+
+    def test_guest_quantity_adds_onto_an_existing_line(self):
+        user = User.objects.create_user(email="returning@example.com", password="pass12345")
+        CartItem.objects.create(user=user, variant=self.kept, quantity=4)
+
+        self.client.post(
+            "/api/auth/login/",
+            {"email": "returning@example.com", "password": "pass12345"},
+            format="json",
+            headers={GUEST_CART_HEADER: dump_guest_cart({self.kept.id: 2, self.added.id: 1})},
+        )
+
+        self.assertEqual(self._cart("returning@example.com"), {self.kept.id: 6, self.added.id: 1})
+
+
+class CartConcurrencyTests(TransactionTestCase):
+    ROUNDS = 5
+    ADDS = 10
+
+    def test_concurrent_adds_of_the_same_variant_sum_into_one_line(self):
+        user = User.objects.create(email="racer@example.com", username="racer")
+        (variant,) = _create_variants(1)
+        errors = []
+
+        def add(quantity, barrier):
+            barrier.wait()
+            try:
+                for _ in range(self.ADDS):
+                    retry_locked(lambda: apply_cart_plan(user, {variant.id: (None, quantity)}))
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        # Each round starts without a cart line, so the threads race to insert it and then to add to it.
+        for _ in range(self.ROUNDS):
+            CartItem.objects.filter(user=user).delete()
+            barrier = threading.Barrier(2)
+            threads = [threading.Thread(target=add, args=(quantity, barrier)) for quantity in (2, 3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(errors, [])
+            quantities = list(CartItem.objects.filter(user=user).values_list("quantity", flat=True))
+            self.assertEqual(quantities, [5 * self.ADDS])
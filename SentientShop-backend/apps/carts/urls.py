@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import CartView, CartItemDetailView
+from .views import CartBatchView, CartItemDetailView, cart_view
 
 urlpatterns = [
-    path("", CartView.as_view()),
+    path("", cart_view),
+    path("batch/", CartBatchView.as_view()),
     path("<int:item_id>/", CartItemDetailView.as_view()),
 ]
@@ -1,31 +1,29 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny
 from rest_framework import status
+from .api import aget_cart, apply_cart_plan, apply_guest_cart_plan, get_cart, parse_cart_operations, plan_cart_operations
 from .models import CartItem
+from .sessions import (
+    GUEST_CART_HEADER,
+    MAX_GUEST_CART_LINES,
+    aget_guest_cart,
+    dump_guest_cart,
+    get_guest_cart,
+    guest_cart_from_request,
+    load_guest_cart,
+)
 from apps.store.models import ProductVariant
+from core.async_views import async_read_view, json_response
 
 
 class CartView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [AllowAny]
 
     def get(self, request):
-        items = CartItem.objects.filter(user=request.user)
-
-        data = [
-            {
-                "id": item.id,
-                "variant": item.variant.id,
-                "product": item.variant.product.name,
-                "size": item.variant.size,
-                "color": item.variant.color,
-                "price": float(item.variant.price),
-                "quantity": item.quantity,
-            }
-            for item in items
-        ]
-
-        return Response(data)
+        if not request.user.is_authenticated:
+            return Response(get_guest_cart(guest_cart_from_request(request)))
+        return Response(get_cart(request.user))
 
     def post(self, request):
         variant_id = request.data.get("variant") or request.data.get("variant_id")
@@ -57,24 +55,76 @@ class CartView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        item, created = CartItem.objects.get_or_create(
-            user=request.user,
-            variant=variant,
-            defaults={"quantity": qty},
-        )
+        if not request.user.is_authenticated:
+            items = guest_cart_from_request(request)
+            if variant.id not in items and len(items) >= MAX_GUEST_CART_LINES:
+                return Response(
+                    {"error": f"Guest carts hold at most {MAX_GUEST_CART_LINES} items"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            items[variant.id] = items.get(variant.id, 0) + qty
+            return Response({"status": "added", "guest_cart": dump_guest_cart(items)}, status=201)
+
+        apply_cart_plan(request.user, {variant.id: (None, qty)})
+        return Response({"status": "added"}, status=201)
 
-        if not created:
-            item.quantity += qty
-            item.save()
 
-        return Response({"status": "added"}, status=201)
+class CartBatchView(APIView):
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        operations = request.data.get("operations") if isinstance(request.data, dict) else None
+        plan = plan_cart_operations(parse_cart_operations(operations))
+
+        if not request.user.is_authenticated:
+            items = apply_guest_cart_plan(guest_cart_from_request(request), plan)
+            if len(items) > MAX_GUEST_CART_LINES:
+                return Response(
+                    {"error": f"Guest carts hold at most {MAX_GUEST_CART_LINES} items"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            return Response(get_guest_cart(items))
+
+        apply_cart_plan(request.user, plan)
+        return Response(get_cart(request.user))
 
 
 
 class CartItemDetailView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [AllowAny]
+
+    # Guest cart lines are addressed by variant id.
+    def _guest_patch(self, request, variant_id):
+        items = guest_cart_from_request(request)
+        if variant_id not in items:
+            return Response({"error": "Item not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            quantity = int(request.data.get("quantity", items[variant_id]))
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "quantity must be a number"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if quantity < 1:
+            return Response(
+                {"error": "quantity must be at least 1"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        items[variant_id] = quantity
+        return Response({"status": "updated", "guest_cart": dump_guest_cart(items)})
+
+    def _guest_delete(self, request, variant_id):
+        items = guest_cart_from_request(request)
+        if items.pop(variant_id, None) is None:
+            return Response({"error": "Item not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"status": "deleted", "guest_cart": dump_guest_cart(items)})
 
     def patch(self, request, item_id):
+        if not request.user.is_authenticated:
+            return self._guest_patch(request, item_id)
+
         try:
             item = CartItem.objects.get(id=item_id, user=request.user)
         except CartItem.DoesNotExist:
@@ -98,6 +148,9 @@ class CartItemDetailView(APIView):
         return Response({"status": "updated"})
 
     def delete(self, request, item_id):
+        if not request.user.is_authenticated:
+            return self._guest_delete(request, item_id)
+
         try:
             item = CartItem.objects.get(id=item_id, user=request.user)
         except CartItem.DoesNotExist:
@@ -105,3 +158,12 @@ class CartItemDetailView(APIView):
 
         item.delete()
         return Response({"status": "deleted"})
+
+
+async def _read_cart(request, user):
+    if user is None:
+        return json_response(await aget_guest_cart(load_guest_cart(request.headers.get(GUEST_CART_HEADER))))
+    return json_response(await aget_cart(user))
+
+
+cart_view = async_read_view(_read_cart, CartView.as_view())
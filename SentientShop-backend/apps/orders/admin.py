@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Order, OrderItem
+from .payments import record_order_transition
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
@@ -13,6 +14,11 @@ class OrderAdmin(admin.ModelAdmin):
     inlines = [OrderItemInline]
     list_editable = ("status",)
 
+    def save_model(self, request, obj, form, change):
+        old_status = form.initial.get("status") if change else None
+        super().save_model(request, obj, form, change)
+        record_order_transition(obj, old_status)
+
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ("order", "variant", "quantity", "price")
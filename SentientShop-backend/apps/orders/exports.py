@@ -0,0 +1,75 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+ORDER_COLUMNS = [
+    ("id", "id"),
+    ("user_email", "user__email"),
+    ("status", "status"),
+    ("total_amount", "total_amount"),
+    ("created_at", "created_at"),
+    ("stripe_payment_intent", "stripe_payment_intent"),
+]
+
+ORDER_ITEM_COLUMNS = [
+    ("order_id", "order_id"),
+    ("order_status", "order__status"),
+    ("order_created_at", "order__created_at"),
+    ("user_email", "order__user__email"),
+    ("item_id", "id"),
+    ("product_id", "variant__product_id"),
+    ("product_name", "variant__product__name"),
+    ("variant_id", "variant_id"),
+    ("size", "variant__size"),
+    ("color", "variant__color"),
+    ("quantity", "quantity"),
+    ("price", "price"),
+]
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _csv_lines(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _ndjson_lines(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def _stream(queryset, columns, output, name):
+    header = [column for column, _ in columns]
+    rows = queryset.order_by("id").values_list(*[lookup for _, lookup in columns]).iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    )
+    lines = _csv_lines(header, rows) if output == "csv" else _ndjson_lines(header, rows)
+
+    response = StreamingHttpResponse(lines, content_type=EXPORT_FORMATS[output])
+    filename = f"{name}-{timezone.localdate():%Y%m%d}.{output}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_orders(orders, output):
+    return _stream(orders, ORDER_COLUMNS, output, "orders")
+
+
+def export_order_items(items, output):
+    return _stream(items, ORDER_ITEM_COLUMNS, output, "order-items")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.orders.payments import backfill_entitlements
+
+
+class Command(BaseCommand):
+    help = "Create missing purchase entitlements from PAID, SHIPPED and DELIVERED order items."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        pairs = backfill_entitlements(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Checked {pairs} purchased user/product pairs"))
@@ -0,0 +1,102 @@
+import hashlib
+import hmac
+import json
+import random
+import time
+import uuid
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from apps.orders.models import Order
+from apps.orders.tasks import process_pending_events
+from apps.orders.views import stripe_webhook
+
+
+def _build_event(order, event_type):
+    return {
+        "id": f"evt_fake_{uuid.uuid4().hex}",
+        "object": "event",
+        "type": event_type,
+        "data": {
+            "object": {
+                "id": order.stripe_payment_intent or f"pi_fake_{order.id}",
+                "object": "payment_intent",
+                "metadata": {"order_id": str(order.id), "user_id": str(order.user_id)},
+            }
+        },
+    }
+
+
+def _sign(payload, secret):
+    timestamp = int(time.time())
+    signature = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+class Command(BaseCommand):
+    help = "Send signed fake Stripe payment events for PENDING orders to the webhook, offline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=100, help="Number of distinct events to generate.")
+        parser.add_argument("--duplicates", type=float, default=0.0, help="Fraction of events delivered twice.")
+        parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of payment_failed events.")
+        parser.add_argument("--url", help="Post to a running server instead of calling the view in-process.")
+        parser.add_argument("--drain", action="store_true", help="Process the recorded events afterwards.")
+
+    def handle(self, *args, **options):
+        secret = settings.STRIPE_WEBHOOK_SECRET
+        if not secret:
+            raise CommandError("STRIPE_WEBHOOK_SECRET must be set to sign fake events.")
+
+        orders = list(Order.objects.filter(status="PENDING").order_by("id")[: options["count"]])
+        if not orders:
+            raise CommandError("No PENDING orders to generate events for.")
+
+        deliveries = []
+        for order in orders:
+            failed = random.random() < options["failure_rate"]
+            event = _build_event(order, "payment_intent.payment_failed" if failed else "payment_intent.succeeded")
+            payload = json.dumps(event)
+            deliveries.append(payload)
+            if random.random() < options["duplicates"]:
+                deliveries.append(payload)
+        random.shuffle(deliveries)
+
+        factory = RequestFactory()
+        started = time.perf_counter()
+        for payload in deliveries:
+            signature = _sign(payload, secret)
+            if options["url"]:
+                request = Request(
+                    options["url"],
+                    data=payload.encode(),
+                    headers={"Content-Type": "application/json", "Stripe-Signature": signature},
+                )
+                status_code = urlopen(request).status
+            else:
+                request = factory.post(
+                    "/api/orders/webhook/", payload, content_type="application/json", HTTP_STRIPE_SIGNATURE=signature
+                )
+                status_code = stripe_webhook(request).status_code
+            if status_code != 200:
+                raise CommandError(f"Webhook answered {status_code}")
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"Delivered {len(deliveries)} events ({len(deliveries) - len(orders)} duplicates) "
+            f"in {elapsed:.2f}s, {len(deliveries) / elapsed:.0f} events/s"
+        )
+
+        if options["drain"] and not options["url"]:
+            started = time.perf_counter()
+            processed = 0
+            while True:
+                batch = process_pending_events()
+                if not batch:
+                    break
+                processed += batch
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"Processed {processed} events in {elapsed:.2f}s, {processed / elapsed:.0f} events/s")
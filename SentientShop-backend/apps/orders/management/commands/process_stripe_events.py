@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.orders.payments import release_expired_reservations
+from apps.orders.tasks import process_pending_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Process Stripe webhook events recorded by the webhook endpoint. "
+        "With --forever, also cancel PENDING orders whose stock reservation has expired."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--forever", action="store_true", help="Keep polling for new events.")
+        parser.add_argument("--sleep", type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = process_pending_events(batch_size=options["batch_size"])
+            total += processed
+            if options["forever"]:
+                # Abandoned checkouts never get a webhook, so the worker also returns their reserved stock.
+                processed += release_expired_reservations()
+            if processed:
+                continue
+            if not options["forever"]:
+                break
+            time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} events"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.orders.payments import release_expired_reservations
+
+
+class Command(BaseCommand):
+    help = "Cancel PENDING orders whose stock reservation has expired and return the stock."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            released = release_expired_reservations(batch_size=options["batch_size"])
+            if not released:
+                break
+            total += released
+
+        self.stdout.write(self.style.SUCCESS(f"Released {total} expired reservations"))
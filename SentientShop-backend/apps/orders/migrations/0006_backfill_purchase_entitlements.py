@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def backfill_entitlements(apps, schema_editor):
+    OrderItem = apps.get_model("orders", "OrderItem")
+    PurchaseEntitlement = apps.get_model("orders", "PurchaseEntitlement")
+
+    pairs = (
+        OrderItem.objects.filter(order__status__in=["PAID", "SHIPPED", "DELIVERED"])
+        .values_list("order__user_id", "variant__product_id")
+        .distinct()
+        .order_by()
+    )
+    PurchaseEntitlement.objects.bulk_create(
+        [PurchaseEntitlement(user_id=user_id, product_id=product_id) for user_id, product_id in pairs],
+        batch_size=5000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0005_purchaseentitlement"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_entitlements, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from django.conf import settings
-from apps.store.models import ProductVariant
+from apps.store.models import Product, ProductVariant
 
 
 class Order(models.Model):
@@ -12,6 +12,7 @@ class Order(models.Model):
         ("DELIVERED", "Delivered"),
         ("CANCELLED", "Cancelled"),
     ]
+    PURCHASED_STATUSES = ["PAID", "SHIPPED", "DELIVERED"]
 
     user = models.ForeignKey( 
         settings.AUTH_USER_MODEL, 
@@ -27,6 +28,15 @@ class Order(models.Model):
     stripe_payment_intent = models.CharField( 
         max_length=255, null=True, blank=True 
     )
+    reserved_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "reserved_until"], name="order_status_reserved_idx"),
+            models.Index(fields=["status", "created_at"], name="order_status_created_idx"),
+            models.Index(fields=["user", "-id"], name="order_user_recent_idx"),
+        ]
+
     def __str__(self):
         return f"Order {self.id} - {self.user.email}"
 
@@ -39,3 +49,39 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f"{self.variant.product.name} x {self.quantity}"
+
+
+class PurchaseEntitlement(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="purchases")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "product"], name="unique_purchase_per_user_product"),
+        ]
+
+    def __str__(self):
+        return f"User {self.user_id} bought Product {self.product_id}"
+
+
+class StripeEvent(models.Model):
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(processed_at__isnull=True),
+                name="stripe_event_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.type} ({self.event_id})"
@@ -0,0 +1,183 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.analytics.queries import record_status_change, record_transitions
+from apps.carts.models import CartItem
+from apps.store.cache import invalidate_catalog
+from apps.store.services import InsufficientStock, release_stock, reserve_stock
+from apps.store.summaries import adjust_product_counter
+
+from .models import Order, OrderItem, PurchaseEntitlement
+
+
+class CheckoutError(Exception):
+    pass
+
+
+def _load_cart_items(user):
+    return list(CartItem.objects.select_related("variant", "variant__product").filter(user=user))
+
+
+def _validate_stock(cart_items):
+    for item in cart_items:
+        if item.quantity > item.variant.stock:
+            return item
+    return None
+
+
+def order_reference(order_id):
+    return f"order:{order_id}"
+
+
+def order_quantities(order_ids):
+    rows = (
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .values("variant_id")
+        .annotate(quantity=Sum("quantity"))
+        .order_by()
+    )
+    return {row["variant_id"]: row["quantity"] for row in rows}
+
+
+@transaction.atomic
+def place_order(user):
+    cart_items = _load_cart_items(user)
+    if not cart_items:
+        raise CheckoutError("Cart is empty")
+
+    out_of_stock_item = _validate_stock(cart_items)
+    if out_of_stock_item:
+        raise CheckoutError(f"Insufficient stock for {out_of_stock_item.variant.product.name}")
+
+    total = Decimal("0")
+    quantities = {}
+    order_items = []
+    for item in cart_items:
+        price = item.variant.price
+        total += price * item.quantity
+        quantities[item.variant_id] = quantities.get(item.variant_id, 0) + item.quantity
+        order_items.append(OrderItem(variant=item.variant, quantity=item.quantity, price=price))
+
+    order = Order.objects.create(
+        user=user,
+        total_amount=total,
+        status="PENDING",
+        reserved_until=timezone.now() + timedelta(minutes=settings.STOCK_RESERVATION_MINUTES),
+    )
+    try:
+        reserve_stock(quantities, order_reference(order.id))
+    except InsufficientStock:
+        raise CheckoutError("Insufficient stock for one or more items in your cart")
+
+    for order_item in order_items:
+        order_item.order = order
+    OrderItem.objects.bulk_create(order_items)
+    record_status_change(order, None)
+    return order
+
+
+def record_order_transition(order, old_status):
+    record_status_change(order, old_status)
+
+    was_purchased = old_status in Order.PURCHASED_STATUSES
+    if was_purchased == (order.status in Order.PURCHASED_STATUSES):
+        return
+
+    sign = -1 if was_purchased else 1
+    rows = (
+        OrderItem.objects.filter(order=order)
+        .values("variant__product_id")
+        .annotate(quantity=Sum("quantity"))
+        .order_by()
+    )
+    units = {row["variant__product_id"]: sign * row["quantity"] for row in rows}
+    adjust_product_counter("units_sold", units)
+    invalidate_catalog(units)
+
+    if was_purchased:
+        revoke_entitlements(order.user_id, units)
+    else:
+        PurchaseEntitlement.objects.bulk_create(
+            [PurchaseEntitlement(user_id=order.user_id, product_id=product_id) for product_id in units],
+            ignore_conflicts=True,
+        )
+
+
+def revoke_entitlements(user_id, product_ids):
+    still_purchased = OrderItem.objects.filter(
+        order__user_id=user_id,
+        order__status__in=Order.PURCHASED_STATUSES,
+        variant__product_id__in=product_ids,
+    ).values("variant__product_id")
+    PurchaseEntitlement.objects.filter(user_id=user_id, product_id__in=product_ids).exclude(
+        product_id__in=still_purchased
+    ).delete()
+
+
+def backfill_entitlements(batch_size=5000):
+    pairs = (
+        OrderItem.objects.filter(order__status__in=Order.PURCHASED_STATUSES)
+        .values_list("order__user_id", "variant__product_id")
+        .distinct()
+        .order_by()
+    )
+    seen = 0
+    batch = []
+    for user_id, product_id in pairs.iterator(chunk_size=batch_size):
+        batch.append(PurchaseEntitlement(user_id=user_id, product_id=product_id))
+        if len(batch) == batch_size:
+            PurchaseEntitlement.objects.bulk_create(batch, ignore_conflicts=True)
+            seen += len(batch)
+            batch = []
+    PurchaseEntitlement.objects.bulk_create(batch, ignore_conflicts=True)
+    return seen + len(batch)
+
+
+def set_order_status(order, new_status, update_fields=()):
+    old_status = order.status
+    order.status = new_status
+    order.save(update_fields=["status", *update_fields])
+    record_order_transition(order, old_status)
+
+
+def cancel_order(order):
+    if order.reserved_until is not None:
+        release_stock(order_quantities([order.id]), order_reference(order.id))
+
+    order.reserved_until = None
+    set_order_status(order, "CANCELLED", ["reserved_until"])
+
+
+def release_expired_reservations(now=None, batch_size=500):
+    now = now or timezone.now()
+    with transaction.atomic():
+        expired = list(
+            Order.objects.select_for_update(skip_locked=True)
+            .filter(status="PENDING", reserved_until__lte=now)
+            .values_list("id", "created_at", "total_amount")[:batch_size]
+        )
+        if not expired:
+            return 0
+
+        order_ids = [order_id for order_id, _, _ in expired]
+        rows = (
+            OrderItem.objects.filter(order_id__in=order_ids)
+            .values("order_id", "variant_id")
+            .annotate(quantity=Sum("quantity"))
+            .order_by()
+        )
+        movements = [(row["variant_id"], row["quantity"], order_reference(row["order_id"])) for row in rows]
+        quantities = {}
+        for variant_id, quantity, _ in movements:
+            quantities[variant_id] = quantities.get(variant_id, 0) + quantity
+        release_stock(quantities, movements=movements)
+        Order.objects.filter(id__in=order_ids).update(status="CANCELLED", reserved_until=None)
+        record_transitions(
+            (created_at, total_amount, "PENDING", "CANCELLED") for _, created_at, total_amount in expired
+        )
+    return len(expired)
@@ -0,0 +1,12 @@
+from rest_framework import serializers
+
+from .models import Order
+
+
+class AdminOrderSerializer(serializers.ModelSerializer):
+    user = serializers.EmailField(source="user.email", read_only=True)
+    total = serializers.DecimalField(source="total_amount", max_digits=10, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ["id", "user", "total", "status", "created_at"]
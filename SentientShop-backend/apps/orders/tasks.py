@@ -0,0 +1,21 @@
+from django.db import transaction
+
+from .models import StripeEvent
+from .webhooks import dispatch
+
+MAX_EVENT_ATTEMPTS = 5
+
+
+def process_pending_events(batch_size=100):
+    with transaction.atomic():
+        events = list(
+            StripeEvent.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True, attempts__lt=MAX_EVENT_ATTEMPTS)
+            .order_by("id")[:batch_size]
+        )
+        if not events:
+            return 0
+
+        dispatch(events)
+        StripeEvent.objects.bulk_update(events, ["attempts", "processed_at", "last_error"])
+    return len(events)
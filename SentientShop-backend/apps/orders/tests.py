@@ -0,0 +1,209 @@
+import json
+import threading
+from unittest import mock
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.carts.models import CartItem
+from apps.store.models import Product, ProductVariant, StockMovement
+from core.testing import retry_locked
+
+from .models import Order, PurchaseEntitlement, StripeEvent
+from .payments import CheckoutError, order_reference, place_order, release_expired_reservations
+from .tasks import process_pending_events
+
+
+class PlaceOrderConcurrencyTests(TransactionTestCase):
+    BUYERS = 24
+    STOCK = 15
+    QUANTITY = 2
+
+    def setUp(self):
+        product = Product.objects.create(name="Flash sale tee", description="Limited run")
+        self.variant = ProductVariant.objects.create(
+            product=product, size="M", color="black", price=499, stock=self.STOCK
+        )
+        self.buyers = [
+            User.objects.create(email=f"buyer{index}@example.com", username=f"buyer{index}")
+            for index in range(self.BUYERS)
+        ]
+        CartItem.objects.bulk_create(
+            [CartItem(user=buyer, variant=self.variant, quantity=self.QUANTITY) for buyer in self.buyers]
+        )
+
+    def _checkout_concurrently(self):
+        barrier = threading.Barrier(len(self.buyers))
+        results = []
+        errors = []
+
+        def checkout(buyer):
+            barrier.wait()
+            try:
+                retry_locked(lambda: place_order(buyer))
+                results.append("placed")
+            except CheckoutError:
+                results.append("rejected")
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=checkout, args=(buyer,)) for buyer in self.buyers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_concurrent_checkouts_never_oversell(self):
+        results, errors = self._checkout_concurrently()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), self.BUYERS)
+        placed = results.count("placed")
+        self.assertEqual(placed, self.STOCK // self.QUANTITY)
+        self.assertEqual(Order.objects.count(), placed)
+
+        self.variant.refresh_from_db()
+        self.assertGreaterEqual(self.variant.stock, 0)
+        self.assertEqual(self.variant.stock, self.STOCK - placed * self.QUANTITY)
+
+
+def _stripe_event(event_id, event_type, **obj):
+    return {"id": event_id, "type": event_type, "data": {"object": obj}}
+
+
+class PlacedOrderTestCase(TestCase):
+    STOCK = 10
+    QUANTITY = 2
+
+    def setUp(self):
+        self.product = Product.objects.create(name="Canvas tote", description="")
+        self.variant = ProductVariant.objects.create(
+            product=self.product, size="M", color="natural", price=250, stock=self.STOCK
+        )
+        self.user = User.objects.create(email="payer@example.com", username="payer")
+        CartItem.objects.create(user=self.user, variant=self.variant, quantity=self.QUANTITY)
+        self.order = place_order(self.user)
+        self.order.stripe_payment_intent = "pi_test"
+        self.order.save(update_fields=["stripe_payment_intent"])
+
+    def _intent_event(self, event_id, event_type):
+        return _stripe_event(
+            event_id, event_type, id="pi_test", object="payment_intent", metadata={"order_id": str(self.order.id)}
+        )
+
+    def _process(self, *events):
+        StripeEvent.objects.bulk_create(
+            [StripeEvent(event_id=event["id"], type=event["type"], payload=event) for event in events]
+        )
+        return process_pending_events()
+
+    def assertOrderState(self, status, stock):
+        self.order.refresh_from_db()
+        self.variant.refresh_from_db()
+        self.assertEqual(self.order.status, status)
+        self.assertEqual(self.variant.stock, stock)
+
+
+class StripeEventHandlerTests(PlacedOrderTestCase):
+    def _refund_event(self, event_id, amount_refunded):
+        amount = int(self.order.total_amount * 100)
+        return _stripe_event(
+            event_id,
+            "charge.refunded",
+            id="ch_test",
+            object="charge",
+            payment_intent="pi_test",
+            amount=amount,
+            amount_refunded=amount_refunded,
+            refunded=amount_refunded == amount,
+        )
+
+    def _expire_reservation(self):
+        later = timezone.now() + timedelta(minutes=settings.STOCK_RESERVATION_MINUTES + 1)
+        self.assertEqual(release_expired_reservations(now=later), 1)
+        self.assertOrderState("CANCELLED", self.STOCK)
+
+    def test_payment_succeeded_keeps_the_reservation(self):
+        self._process(self._intent_event("evt_paid", "payment_intent.succeeded"))
+
+        self.assertOrderState("PAID", self.STOCK - self.QUANTITY)
+        self.assertIsNone(self.order.reserved_until)
+
+    def test_payment_failed_cancels_and_releases_stock(self):
+        self._process(self._intent_event("evt_failed", "payment_intent.payment_failed"))
+
+        self.assertOrderState("CANCELLED", self.STOCK)
+
+    def test_full_refund_cancels_and_releases_stock(self):
+        self._process(self._intent_event("evt_paid", "payment_intent.succeeded"))
+        self._process(self._refund_event("evt_refund", int(self.order.total_amount * 100)))
+
+        self.assertOrderState("CANCELLED", self.STOCK)
+
+    def test_partial_refund_keeps_the_order_paid(self):
+        self._process(self._intent_event("evt_paid", "payment_intent.succeeded"))
+        self._process(self._refund_event("evt_refund", 100))
+
+        self.assertOrderState("PAID", self.STOCK - self.QUANTITY)
+
+    def test_payment_after_expired_reservation_takes_stock_again(self):
+        self._expire_reservation()
+
+        self._process(self._intent_event("evt_paid", "payment_intent.succeeded"))
+
+        self.assertOrderState("PAID", self.STOCK - self.QUANTITY)
+
+    def test_payment_after_expired_reservation_cancels_when_sold_out(self):
+        self._expire_reservation()
+        ProductVariant.objects.filter(id=self.variant.id).update(stock=1)
+
+        self._process(self._intent_event("evt_paid", "payment_intent.succeeded"))
+
+        self.assertOrderState("CANCELLED", 1)
+        self.assertTrue(CartItem.objects.filter(user=self.user).exists())
+
+
+class StripeWebhookIdempotencyTests(PlacedOrderTestCase):
+    def _deliver(self, event):
+        with mock.patch("stripe.Webhook.construct_event", return_value=event):
+            return self.client.post(
+                "/api/orders/webhook/", json.dumps(event), content_type="application/json", HTTP_STRIPE_SIGNATURE="t=1"
+            )
+
+    def test_redelivered_event_is_stored_and_processed_once(self):
+        event = self._intent_event("evt_paid", "payment_intent.succeeded")
+
+        self.assertEqual(self._deliver(event).status_code, 200)
+        self.assertEqual(self._deliver(event).status_code, 200)
+        self.assertEqual(StripeEvent.objects.filter(event_id="evt_paid").count(), 1)
+        self.assertEqual(process_pending_events(), 1)
+
+        self.assertEqual(self._deliver(event).status_code, 200)
+        self.assertEqual(process_pending_events(), 0)
+        self.assertEqual(StripeEvent.objects.get(event_id="evt_paid").attempts, 1)
+        self.assertOrderState("PAID", self.STOCK - self.QUANTITY)
+
+    def test_worker_marks_a_pending_order_paid_once(self):
+        self._process(
+            self._intent_event("evt_paid_1", "payment_intent.succeeded"),
+            self._intent_event("evt_paid_2", "payment_intent.succeeded"),
+        )
+        self._process(self._intent_event("evt_paid_3", "payment_intent.succeeded"))
+
+        self.assertOrderState("PAID", self.STOCK - self.QUANTITY)
+        self.assertFalse(StripeEvent.objects.filter(processed_at__isnull=True).exists())
+        self.assertEqual(
+            StockMovement.objects.filter(kind="SALE", reference=order_reference(self.order.id)).count(), 1
+        )
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.units_sold, self.QUANTITY)
+        self.assertEqual(PurchaseEntitlement.objects.filter(user=self.user).count(), 1)
+        self.assertFalse(CartItem.objects.filter(user=self.user).exists())
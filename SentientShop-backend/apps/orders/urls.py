@@ -2,18 +2,28 @@ from django.urls import path
 
 from .views import (
     AdminDashboardView,
+    AdminLowStockReportView,
+    AdminOrderExportView,
+    AdminOrderItemExportView,
+    AdminOrderListView,
     AdminOrderStatusUpdateView,
     CheckoutView,
     CreatePaymentIntentView,
-    OrderListView,
+    PurchasedProductsView,
+    order_list_view,
     stripe_webhook,
 )
 
 urlpatterns = [
-    path("", OrderListView.as_view(), name="order-list"),
+    path("", order_list_view, name="order-list"),
     path("checkout/", CheckoutView.as_view()),
+    path("purchased/", PurchasedProductsView.as_view()),
     path("create-payment-intent/", CreatePaymentIntentView.as_view()),
     path("webhook/", stripe_webhook),
     path("admin/dashboard/", AdminDashboardView.as_view()),
+    path("admin/inventory/low-stock/", AdminLowStockReportView.as_view()),
+    path("admin/orders/", AdminOrderListView.as_view()),
+    path("admin/orders/export/", AdminOrderExportView.as_view()),
+    path("admin/order-items/export/", AdminOrderItemExportView.as_view()),
     path("admin/orders/<int:order_id>/status/", AdminOrderStatusUpdateView.as_view()),
 ]
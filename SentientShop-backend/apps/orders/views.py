@@ -1,106 +1,111 @@
-from decimal import Decimal
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
 
 import stripe
 from django.conf import settings
 from django.db import transaction
-from django.db.models import Count, Sum
-from django.db.models.functions import TruncDate
 from django.http import HttpResponse
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from apps.accounts.models import User
-from apps.carts.models import CartItem
+from apps.analytics.dashboard import sales_summary
+from apps.analytics.inventory import low_stock_report
+from apps.analytics.models import VariantSalesVelocity
 from apps.store.models import Product
+from core.async_views import async_read_view, json_response
+from core.instrumentation import TimedSerializerMixin
+from core.pagination import IdCursorPagination
 from core.permissions import IsAdminRole
 
-from .models import Order, OrderItem
+from .exports import EXPORT_FORMATS, export_order_items, export_orders
+from .models import Order, OrderItem, PurchaseEntitlement, StripeEvent
+from .payments import CheckoutError, cancel_order, place_order, set_order_status
+from .serializers import AdminOrderSerializer
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
+RECENT_ORDERS_LIMIT = 20
+PURCHASED_LOOKUP_LIMIT = 100
+LOW_STOCK_LIMIT = 200
 
-def _load_cart_items(user):
-    return list(CartItem.objects.select_related("variant", "variant__product").filter(user=user))
 
+def _parse_date(value):
+    if not value:
+        return None
+    return date.fromisoformat(value)
 
-def _calculate_total(cart_items):
-    return sum(item.variant.price * item.quantity for item in cart_items)
 
+def _parse_amount(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        amount = None
+    if amount is None or not amount.is_finite():
+        raise ValidationError({"error": f"{name} must be a number"})
+    return amount
 
-def _validate_stock(cart_items):
-    for item in cart_items:
-        if item.quantity > item.variant.stock:
-            return item
-    return None
 
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
 
-def _find_order_from_intent(intent):
-    intent_id = intent.get("id")
-    order_id = intent.get("metadata", {}).get("order_id")
 
-    order = None
-    if order_id:
-        order = Order.objects.select_for_update().filter(id=order_id).first()
-    if not order and intent_id:
-        order = Order.objects.select_for_update().filter(stripe_payment_intent=intent_id).first()
-    return order
+def _admin_order_filters(params):
+    filters = {}
 
+    statuses = params.get("status")
+    if statuses:
+        statuses = {value.strip().upper() for value in statuses.split(",")}
+        allowed_status = {choice[0] for choice in Order.STATUS_CHOICES}
+        if statuses - allowed_status:
+            raise ValidationError({"error": "Invalid status", "allowed": sorted(allowed_status)})
+        filters["status__in"] = statuses
 
-def _mark_order_paid_and_sync_inventory(order):
-    if order.status == "PAID":
-        return
+    try:
+        start = _parse_date(params.get("start"))
+        end = _parse_date(params.get("end"))
+    except ValueError:
+        raise ValidationError({"error": "start and end must be YYYY-MM-DD dates"})
+    if start:
+        filters["created_at__gte"] = _day_start(start)
+    if end:
+        filters["created_at__lt"] = _day_start(end + timedelta(days=1))
 
-    order_items = list(order.items.select_related("variant").all())
-    for order_item in order_items:
-        variant = order_item.variant
-        if variant.stock < order_item.quantity:
-            order.status = "CANCELLED"
-            order.save(update_fields=["status"])
-            return
+    email = params.get("email")
+    if email:
+        filters["user__email__iexact"] = email.strip()
 
-    for order_item in order_items:
-        variant = order_item.variant
-        variant.stock -= order_item.quantity
-        variant.save(update_fields=["stock"])
+    min_total = _parse_amount(params, "min_total")
+    max_total = _parse_amount(params, "max_total")
+    if min_total is not None:
+        filters["total_amount__gte"] = min_total
+    if max_total is not None:
+        filters["total_amount__lte"] = max_total
 
-    order.status = "PAID"
-    order.save(update_fields=["status"])
-    CartItem.objects.filter(user=order.user).delete()
+    return filters
 
 
 class CheckoutView(APIView):
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
     def post(self, request):
-        cart_items = _load_cart_items(request.user)
-        if not cart_items:
-            return Response({"error": "Cart is empty"}, status=status.HTTP_400_BAD_REQUEST)
-
-        out_of_stock_item = _validate_stock(cart_items)
-        if out_of_stock_item:
-            return Response(
-                {
-                    "error": f"Insufficient stock for {out_of_stock_item.variant.product.name}",
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        total = _calculate_total(cart_items)
-        order = Order.objects.create(user=request.user, total_amount=total, status="PENDING")
-        for item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                variant=item.variant,
-                quantity=item.quantity,
-                price=item.variant.price,
-            )
+        try:
+            order = place_order(request.user)
+        except CheckoutError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response(
-            {"message": "Order created successfully", "order_id": order.id, "total": total},
+            {"message": "Order created successfully", "order_id": order.id, "total": order.total_amount},
             status=status.HTTP_201_CREATED,
         )
 
@@ -109,68 +114,83 @@ class OrderListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        orders = Order.objects.filter(user=request.user).prefetch_related("items__variant__product").order_by("-id")
-        data = []
-        for order in orders:
-            invoice_number = f"INV-{order.created_at:%Y%m%d}-{order.id:05d}"
-            data.append(
-                {
-                    "id": order.id,
-                    "total_amount": order.total_amount,
-                    "status": order.status,
-                    "created_at": order.created_at,
-                    "invoice_number": invoice_number,
-                    "invoice_available": order.status in ["PAID", "SHIPPED", "DELIVERED"],
-                    "items": [
-                        {
-                            "product": item.variant.product.name,
-                            "size": item.variant.size,
-                            "color": item.variant.color,
-                            "price": item.price,
-                            "quantity": item.quantity,
-                        }
-                        for item in order.items.all()
-                    ],
-                }
-            )
+        return Response([_order_history_entry(order) for order in _order_history(request.user)])
 
-        return Response(data)
+
+def _order_history(user):
+    return Order.objects.filter(user=user).prefetch_related("items__variant__product").order_by("-id")
+
+
+def _order_history_entry(order):
+    return {
+        "id": order.id,
+        "total_amount": order.total_amount,
+        "status": order.status,
+        "created_at": order.created_at,
+        "invoice_number": f"INV-{order.created_at:%Y%m%d}-{order.id:05d}",
+        "invoice_available": order.status in Order.PURCHASED_STATUSES,
+        "items": [
+            {
+                "product": item.variant.product.name,
+                "size": item.variant.size,
+                "color": item.variant.color,
+                "price": item.price,
+                "quantity": item.quantity,
+            }
+            for item in order.items.all()
+        ],
+    }
+
+
+async def _read_order_history(request, user):
+    return json_response([_order_history_entry(order) async for order in _order_history(user)])
+
+
+order_list_view = async_read_view(_read_order_history, OrderListView.as_view(), login_required=True)
+
+
+class PurchasedProductsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            product_ids = {int(value) for value in request.query_params.get("products", "").split(",") if value}
+        except ValueError:
+            return Response({"error": "products must be a comma-separated list of ids"}, status=400)
+        if len(product_ids) > PURCHASED_LOOKUP_LIMIT:
+            return Response({"error": f"At most {PURCHASED_LOOKUP_LIMIT} products per request"}, status=400)
+
+        purchased = PurchaseEntitlement.objects.filter(user=request.user, product_id__in=product_ids).values_list(
+            "product_id", flat=True
+        )
+        return Response({"purchased": sorted(purchased)})
 
 
 class CreatePaymentIntentView(APIView):
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
     def post(self, request):
-        cart_items = _load_cart_items(request.user)
-        if not cart_items:
-            return Response({"error": "Cart empty"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            order = place_order(request.user)
+        except CheckoutError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        out_of_stock_item = _validate_stock(cart_items)
-        if out_of_stock_item:
-            return Response(
-                {
-                    "error": f"Insufficient stock for {out_of_stock_item.variant.product.name}",
-                },
-                status=status.HTTP_400_BAD_REQUEST,
+        # The order and its reservation are committed before calling Stripe so no row locks span the round trip.
+        try:
+            intent = stripe.PaymentIntent.create(
+                amount=int(order.total_amount * 100),
+                currency="inr",
+                metadata={"order_id": str(order.id), "user_id": str(request.user.id)},
             )
-
-        total = _calculate_total(cart_items)
-        order = Order.objects.create(user=request.user, total_amount=total, status="PENDING")
-        for item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                variant=item.variant,
-                quantity=item.quantity,
-                price=item.variant.price,
+        except stripe.error.StripeError:
+            with transaction.atomic():
+                order = Order.objects.select_for_update().get(id=order.id)
+                if order.status == "PENDING":
+                    cancel_order(order)
+            return Response(
+                {"error": "Could not start the payment, please try again"}, status=status.HTTP_502_BAD_GATEWAY
             )
 
-        intent = stripe.PaymentIntent.create(
-            amount=int(Decimal(total) * 100),
-            currency="inr",
-            metadata={"order_id": str(order.id), "user_id": str(request.user.id)},
-        )
-
         order.stripe_payment_intent = intent.id
         order.save(update_fields=["stripe_payment_intent"])
 
@@ -186,76 +206,109 @@ def stripe_webhook(request):
     except Exception:
         return HttpResponse(status=400)
 
-    event_type = event.get("type")
-    intent = event.get("data", {}).get("object", {})
+    # Processing happens in apps.orders.tasks; the unique event_id makes redeliveries a no-op.
+    StripeEvent.objects.bulk_create(
+        [StripeEvent(event_id=event["id"], type=event["type"], payload=json.loads(payload))],
+        ignore_conflicts=True,
+    )
+    return HttpResponse(status=200)
 
-    if event_type in ["payment_intent.succeeded", "payment_intent.payment_failed"]:
-        with transaction.atomic():
-            order = _find_order_from_intent(intent)
-            if not order:
-                return HttpResponse(status=200)
 
-            if event_type == "payment_intent.succeeded":
-                _mark_order_paid_and_sync_inventory(order)
-            elif order.status == "PENDING":
-                order.status = "CANCELLED"
-                order.save(update_fields=["status"])
+class AdminDashboardView(APIView):
+    permission_classes = [IsAdminRole]
+
+    def get(self, request):
+        try:
+            start = _parse_date(request.query_params.get("start"))
+            end = _parse_date(request.query_params.get("end"))
+        except ValueError:
+            return Response({"error": "start and end must be YYYY-MM-DD dates"}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = sales_summary(start, end)
+        data["metrics"]["total_products"] = Product.objects.count()
+        data["metrics"]["total_users"] = User.objects.count()
+        recent_orders = Order.objects.select_related("user").order_by("-id")[:RECENT_ORDERS_LIMIT]
+        data["orders"] = [
+            {
+                "id": order.id,
+                "user": order.user.email,
+                "total": order.total_amount,
+                "status": order.status,
+                "created_at": order.created_at,
+            }
+            for order in recent_orders
+        ]
 
-    return HttpResponse(status=200)
+        return Response(data)
 
 
-class AdminDashboardView(APIView):
+class AdminLowStockReportView(APIView):
     permission_classes = [IsAdminRole]
 
     def get(self, request):
-        orders = Order.objects.select_related("user").all().order_by("-id")
-        paid_orders = Order.objects.filter(status="PAID")
-
-        revenue_by_day = (
-            paid_orders.annotate(day=TruncDate("created_at"))
-            .values("day")
-            .annotate(revenue=Sum("total_amount"))
-            .order_by("day")
-        )
-        orders_by_day = (
-            Order.objects.annotate(day=TruncDate("created_at"))
-            .values("day")
-            .annotate(orders=Count("id"))
-            .order_by("day")
-        )
-        status_summary = (
-            Order.objects.values("status").annotate(count=Count("id")).order_by("status")
+        params = request.query_params
+        try:
+            cover_days = int(params.get("cover_days", 14))
+            target_days = int(params.get("target_days", 30))
+            limit = min(int(params.get("limit", 50)), LOW_STOCK_LIMIT)
+        except ValueError:
+            return Response(
+                {"error": "cover_days, target_days and limit must be numbers"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if cover_days <= 0 or target_days <= 0 or limit <= 0:
+            return Response(
+                {"error": "cover_days, target_days and limit must be positive"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        latest = VariantSalesVelocity.objects.order_by("-computed_at").values_list("computed_at", flat=True).first()
+        return Response(
+            {
+                "computed_at": latest,
+                "cover_days": cover_days,
+                "target_days": target_days,
+                "results": low_stock_report(cover_days, target_days, limit),
+            }
         )
 
-        data = {
-            "metrics": {
-                "total_orders": orders.count(),
-                "paid_orders": paid_orders.count(),
-                "pending_orders": Order.objects.filter(status="PENDING").count(),
-                "total_revenue": paid_orders.aggregate(total=Sum("total_amount"))["total"] or 0,
-                "total_products": Product.objects.count(),
-                "total_users": User.objects.count(),
-            },
-            "orders": [
-                {
-                    "id": order.id,
-                    "user": order.user.email,
-                    "total": order.total_amount,
-                    "status": order.status,
-                    "created_at": order.created_at,
-                }
-                for order in orders
-            ],
-            "revenue_summary": [{"status": row["status"], "count": row["count"]} for row in status_summary],
-            "charts": {
-                "revenue_by_day": [
-                    {"date": row["day"], "revenue": float(row["revenue"] or 0)} for row in revenue_by_day
-                ],
-                "orders_by_day": [{"date": row["day"], "orders": row["orders"]} for row in orders_by_day],
-            },
-        }
 
-        return Response(data)
+class AdminOrderListView(TimedSerializerMixin, ListAPIView):
+    permission_classes = [IsAdminRole]
+    serializer_class = AdminOrderSerializer
+    pagination_class = IdCursorPagination
+
+    def get_queryset(self):
+        return Order.objects.select_related("user").filter(**_admin_order_filters(self.request.query_params))
+
+
+class AdminOrderExportView(APIView):
+    permission_classes = [IsAdminRole]
+
+    def get(self, request):
+        output = request.query_params.get("output", "csv")
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {"error": "Invalid output", "allowed": sorted(EXPORT_FORMATS)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        orders = Order.objects.filter(**_admin_order_filters(request.query_params))
+        return export_orders(orders, output)
+
+
+class AdminOrderItemExportView(APIView):
+    permission_classes = [IsAdminRole]
+
+    def get(self, request):
+        output = request.query_params.get("output", "csv")
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {"error": "Invalid output", "allowed": sorted(EXPORT_FORMATS)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        filters = _admin_order_filters(request.query_params)
+        items = OrderItem.objects.filter(**{f"order__{lookup}": value for lookup, value in filters.items()})
+        return export_order_items(items, output)
 
 
 class AdminOrderStatusUpdateView(APIView):
@@ -270,11 +323,13 @@ class AdminOrderStatusUpdateView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            order = Order.objects.get(id=order_id)
-        except Order.DoesNotExist:
-            return Response({"error": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
+        with transaction.atomic():
+            order = Order.objects.select_for_update().filter(id=order_id).first()
+            if not order:
+                return Response({"error": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        order.status = status_value
-        order.save(update_fields=["status"])
+            if status_value == "CANCELLED" and order.status == "PENDING":
+                cancel_order(order)
+            else:
+                set_order_status(order, status_value)
         return Response({"status": "updated", "order_id": order.id, "new_status": order.status})
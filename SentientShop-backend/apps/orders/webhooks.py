@@ -1,60 +1,140 @@
-import stripe
-from django.conf import settings
-from django.http import HttpResponse
+import logging
+import time
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
 from apps.carts.models import CartItem
-from django.views.decorators.csrf import csrf_exempt
+from apps.store.services import InsufficientStock, release_stock, reserve_stock
+
 from .models import Order
+from .payments import cancel_order, order_quantities, order_reference, set_order_status
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
+logger = logging.getLogger(__name__)
 
-@csrf_exempt
-def stripe_webhook(request):
-    payload = request.body
-    sig_header = request.META.get("HTTP_STRIPE_SIGNATURE")
+EVENT_HANDLERS = {}
 
-    try:
-        event = stripe.Webhook.construct_event(
-            payload,
-            sig_header,
-            settings.STRIPE_WEBHOOK_SECRET
-        )
-    except Exception as e:
-        print("Webhook signature error:", e)
-        return HttpResponse(status=400)
 
-    print("Stripe event:", event["type"])
+def handles(*event_types):
+    def register(handler):
+        for event_type in event_types:
+            EVENT_HANDLERS[event_type] = handler
+        return handler
 
-    if event["type"] == "payment_intent.succeeded":
+    return register
 
-        intent = event["data"]["object"]
-        metadata = intent.get("metadata", {})
 
-        order_id = metadata.get("order_id")
+def _order_refs(event):
+    obj = event.payload.get("data", {}).get("object", {})
+    intent_id = obj.get("payment_intent") if obj.get("object") == "charge" else obj.get("id")
+    order_id = obj.get("metadata", {}).get("order_id")
+    try:
+        order_id = int(order_id) if order_id else None
+    except (TypeError, ValueError):
+        order_id = None
+    return order_id, intent_id
+
+
+class EventBatch:
+    def __init__(self, events):
+        order_ids, intent_ids = set(), set()
+        for event in events:
+            if event.type not in EVENT_HANDLERS:
+                continue
+            order_id, intent_id = _order_refs(event)
+            if order_id:
+                order_ids.add(order_id)
+            if intent_id:
+                intent_ids.add(intent_id)
+
+        orders = []
+        if order_ids or intent_ids:
+            orders = list(
+                Order.objects.select_for_update()
+                .filter(Q(id__in=order_ids) | Q(stripe_payment_intent__in=intent_ids))
+                .order_by("id")
+            )
+        self.orders_by_id = {order.id: order for order in orders}
+        self.orders_by_intent = {order.stripe_payment_intent: order for order in orders if order.stripe_payment_intent}
+        self.cleared_cart_user_ids = set()
+
+    def order_for(self, event):
+        order_id, intent_id = _order_refs(event)
+        return self.orders_by_id.get(order_id) or self.orders_by_intent.get(intent_id)
+
+    def flush(self):
+        if self.cleared_cart_user_ids:
+            CartItem.objects.filter(user_id__in=self.cleared_cart_user_ids).delete()
+
+
+@handles("payment_intent.succeeded")
+def _payment_succeeded(batch, event, order):
+    if order.status == "PAID":
+        return
+
+    if order.reserved_until is None:
+        # The order no longer holds a reservation (expired or pre-reservation), so take stock now.
+        try:
+            reserve_stock(order_quantities([order.id]), order_reference(order.id))
+        except InsufficientStock:
+            set_order_status(order, "CANCELLED")
+            logger.warning("stripe_order_cancelled order_id=%s reason=insufficient_stock", order.id)
+            return
 
-        if not order_id:
-            print("No order_id — ignoring event")
-            return HttpResponse(status=200)
+    order.reserved_until = None
+    set_order_status(order, "PAID", ["reserved_until"])
+    batch.cleared_cart_user_ids.add(order.user_id)
 
-        try:
-            order = Order.objects.get(id=order_id)
 
-            if order.status != "PAID":
-                print("Marking order PAID:", order.id)
+@handles("payment_intent.payment_failed", "payment_intent.canceled")
+def _payment_failed(batch, event, order):
+    if order.status == "PENDING":
+        cancel_order(order)
+
 
-                order.status = "PAID"
-                order.save()
+@handles("charge.refunded")
+def _charge_refunded(batch, event, order):
+    charge = event.payload.get("data", {}).get("object", {})
+    if not charge.get("refunded") or order.status != "PAID":
+        # Partial refunds and orders already shipped keep their status and stock.
+        return
 
-                # Deduct stock
-                for item in order.items.all():
-                    variant = item.variant
-                    variant.stock -= item.quantity
-                    variant.save()
+    release_stock(order_quantities([order.id]), order_reference(order.id))
+    set_order_status(order, "CANCELLED")
 
-                # Clear cart
-                CartItem.objects.filter(user=order.user).delete()
 
-        except Order.DoesNotExist:
-            print("Order not found:", order_id)
+def dispatch(events):
+    batch_started = time.perf_counter()
+    batch = EventBatch(events)
+    now = timezone.now()
 
-    return HttpResponse(status=200)
+    for event in events:
+        event.attempts += 1
+        started = time.perf_counter()
+        handler = EVENT_HANDLERS.get(event.type)
+        order = batch.order_for(event) if handler else None
+        try:
+            if order:
+                with transaction.atomic():
+                    handler(batch, event, order)
+        except Exception as exc:
+            logger.exception("stripe_event_failed event_id=%s type=%s", event.event_id, event.type)
+            event.last_error = repr(exc)
+            continue
+
+        event.processed_at = now
+        event.last_error = ""
+        logger.info(
+            "stripe_event_handled event_id=%s type=%s order_id=%s handled=%s duration_ms=%.2f",
+            event.event_id,
+            event.type,
+            order.id if order else None,
+            bool(order),
+            (time.perf_counter() - started) * 1000,
+        )
 
+    batch.flush()
+    logger.info(
+        "stripe_event_batch size=%s duration_ms=%.2f", len(events), (time.perf_counter() - batch_started) * 1000
+    )
@@ -16,6 +16,9 @@ class Review(models.Model):
         constraints = [
             models.UniqueConstraint(fields=["user", "product"], name="unique_review_per_user_product"),
         ]
+        indexes = [
+            models.Index(fields=["product", "-created_at", "-id"], name="review_product_recent_idx"),
+        ]
         ordering = ["-created_at"]
 
     def __str__(self):
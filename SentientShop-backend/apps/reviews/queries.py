@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from apps.store.cache import bump_version, get_version
+
+from .models import Review
+
+RATINGS = range(1, 6)
+
+
+def _histogram_version_key(product_id):
+    return f"reviews:product:{product_id}:version"
+
+
+def rating_histogram(product_id):
+    key = f"reviews:histogram:{product_id}:{get_version(_histogram_version_key(product_id))}"
+    summary = cache.get(key)
+    if summary is None:
+        rows = Review.objects.filter(product_id=product_id).values("rating").annotate(count=Count("id")).order_by()
+        counts = {row["rating"]: row["count"] for row in rows}
+        total = sum(counts.values())
+        summary = {
+            "count": total,
+            "average": round(sum(rating * count for rating, count in counts.items()) / total, 2) if total else None,
+            "histogram": {str(rating): counts.get(rating, 0) for rating in RATINGS},
+        }
+        cache.set(key, summary, timeout=settings.CATALOG_CACHE_TIMEOUT)
+    return summary
+
+
+def invalidate_rating_histogram(product_id):
+    transaction.on_commit(lambda: bump_version(_histogram_version_key(product_id)))
@@ -1,7 +1,8 @@
 from django.urls import path
 
-from .views import ProductReviewListCreateView
+from .views import ProductReviewSummaryView, product_review_list_view
 
 urlpatterns = [
-    path("products/<int:product_id>/reviews/", ProductReviewListCreateView.as_view()),
+    path("products/<int:product_id>/reviews/", product_review_list_view),
+    path("products/<int:product_id>/reviews/summary/", ProductReviewSummaryView.as_view()),
 ]
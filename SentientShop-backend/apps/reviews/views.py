@@ -1,16 +1,34 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from apps.orders.models import OrderItem
+from apps.orders.models import PurchaseEntitlement
+from apps.store.cache import invalidate_catalog
 from apps.store.models import Product
+from apps.store.summaries import refresh_review_summaries
+from core.async_views import async_read_view, json_response
+from core.instrumentation import serializer_data
+from core.pagination import IdCursorPagination
 
 from .models import Review
+from .queries import invalidate_rating_histogram, rating_histogram
 from .serializers import ReviewSerializer
 
 
+class ReviewCursorPagination(IdCursorPagination):
+    ordering = ("-created_at", "-id")
+    page_size = 10
+    max_page_size = 50
+
+
+def _product_reviews(product_id):
+    return Review.objects.filter(product_id=product_id).select_related("user")
+
+
 class ProductReviewListCreateView(APIView):
     def get_permissions(self):
         if self.request.method == "GET":
@@ -18,16 +36,13 @@ class ProductReviewListCreateView(APIView):
         return [IsAuthenticated()]
 
     def get(self, request, product_id):
-        reviews = Review.objects.filter(product_id=product_id).select_related("user")
-        return Response(ReviewSerializer(reviews, many=True).data)
+        paginator = ReviewCursorPagination()
+        page = paginator.paginate_queryset(_product_reviews(product_id), request, view=self)
+        return paginator.get_paginated_response(serializer_data(ReviewSerializer(page, many=True)))
 
     def post(self, request, product_id):
         product = get_object_or_404(Product, id=product_id)
-        has_purchased = OrderItem.objects.filter(
-            order__user=request.user,
-            order__status__in=["PAID", "SHIPPED", "DELIVERED"],
-            variant__product=product,
-        ).exists()
+        has_purchased = PurchaseEntitlement.objects.filter(user=request.user, product=product).exists()
 
         if not has_purchased:
             return Response(
@@ -45,7 +60,26 @@ class ProductReviewListCreateView(APIView):
                 "comment": serializer.validated_data.get("comment", ""),
             },
         )
+        refresh_review_summaries([product.id])
+        invalidate_catalog([product.id])
+        invalidate_rating_histogram(product.id)
 
-        output = ReviewSerializer(review).data
+        output = serializer_data(ReviewSerializer(review))
         status_code = status.HTTP_201_CREATED if created else status.HTTP_200_OK
         return Response(output, status=status_code)
+
+
+class ProductReviewSummaryView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request, product_id):
+        return Response(rating_histogram(product_id))
+
+
+async def _read_product_reviews(request, user, product_id):
+    paginator = ReviewCursorPagination()
+    page = await sync_to_async(paginator.paginate_queryset)(_product_reviews(product_id), Request(request))
+    return json_response(paginator.get_paginated_response(serializer_data(ReviewSerializer(page, many=True))).data)
+
+
+product_review_list_view = async_read_view(_read_product_reviews, ProductReviewListCreateView.as_view())
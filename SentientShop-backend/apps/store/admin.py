@@ -1,5 +1,9 @@
 from django.contrib import admin
+from .cache import invalidate_catalog
+from .ledger import record_stock_changes
 from .models import Product, ProductVariant
+from .search import reindex_products
+from .summaries import refresh_variant_summaries
 
 class ProductVariantInline(admin.TabularInline):
     model = ProductVariant
@@ -7,6 +11,23 @@ class ProductVariantInline(admin.TabularInline):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ("name", "category")
+    list_display = ("name", "category", "min_price", "max_price", "total_stock", "avg_rating", "units_sold")
     list_filter = ("category",)
     inlines = [ProductVariantInline]
+    readonly_fields = ("min_price", "max_price", "total_stock", "avg_rating", "review_count", "units_sold")
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        record_stock_changes(
+            (
+                (variant_form.instance.id, variant_form.initial.get("stock"), variant_form.instance.stock)
+                for formset in formsets
+                if formset.model is ProductVariant
+                for variant_form in formset.forms
+                if "stock" in variant_form.changed_data and variant_form.instance.pk
+            ),
+            "admin",
+        )
+        refresh_variant_summaries([form.instance.id])
+        invalidate_catalog([form.instance.id])
+        reindex_products([form.instance.id])
@@ -0,0 +1,100 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from rest_framework.renderers import JSONRenderer
+
+CATALOG_VERSION_KEY = "catalog:version"
+
+
+def _product_version_key(product_id):
+    return f"catalog:product:{product_id}:version"
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old version.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(key):
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def _bump_versions(product_ids):
+    bump_version(CATALOG_VERSION_KEY)
+    for product_id in product_ids:
+        bump_version(_product_version_key(product_id))
+
+
+def invalidate_catalog(product_ids=()):
+    product_ids = sorted(set(product_ids))
+    transaction.on_commit(lambda: _bump_versions(product_ids))
+
+
+def _request_digest(request):
+    return hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+
+
+def product_list_cache_key(request):
+    return f"catalog:list:{get_version(CATALOG_VERSION_KEY)}:{_request_digest(request)}"
+
+
+def product_detail_cache_key(request, product_id):
+    version = get_version(_product_version_key(product_id))
+    return f"catalog:product:{product_id}:{version}:{_request_digest(request)}"
+
+
+async def aproduct_list_cache_key(request):
+    return f"catalog:list:{await aget_version(CATALOG_VERSION_KEY)}:{_request_digest(request)}"
+
+
+async def aproduct_detail_cache_key(request, product_id):
+    version = await aget_version(_product_version_key(product_id))
+    return f"catalog:product:{product_id}:{version}:{_request_digest(request)}"
+
+
+def json_cache_entry(data):
+    body = JSONRenderer().render(data)
+    return f'"{hashlib.md5(body).hexdigest()}"', body
+
+
+def cached_json_response(request, key, render):
+    entry = cache.get(key)
+    if entry is None:
+        response = render()
+        if response.status_code != 200:
+            return response
+
+        entry = json_cache_entry(response.data)
+        cache.set(key, entry, settings.CATALOG_CACHE_TIMEOUT)
+    return json_entry_response(request, entry)
+
+
+def json_entry_response(request, entry):
+    etag, body = entry
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    return response
@@ -0,0 +1,228 @@
+import csv
+import json
+import logging
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_catalog
+from .ledger import record_stock_changes
+from .models import Product, ProductVariant
+from .search import invalidate_search_index
+from .summaries import refresh_variant_summaries
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_FORMATS = {"csv", "ndjson"}
+MAX_REPORTED_ERRORS = 50
+
+IMPORT_COLUMNS = ["product_ref", "name", "description", "category", "sku", "size", "color", "price", "stock"]
+REQUIRED_COLUMNS = ["product_ref", "name", "sku", "size", "color", "price", "stock"]
+MAX_LENGTHS = {"product_ref": 100, "name": 255, "sku": 100, "size": 10, "color": 20}
+MAX_PRICE = Decimal("100000000")
+
+CATEGORIES = {choice[0] for choice in Product.CATEGORY_CHOICES}
+
+
+class ImportFileError(Exception):
+    def __init__(self, message, line):
+        super().__init__(message)
+        self.line = line
+        self.imported = 0
+
+
+def _decoded_lines(stream):
+    # Decoding line by line pins an encoding error to its line, which a buffered TextIOWrapper cannot.
+    for line_number, line in enumerate(stream, start=1):
+        try:
+            yield line.decode("utf-8-sig" if line_number == 1 else "utf-8")
+        except UnicodeDecodeError:
+            raise ImportFileError("File is not valid UTF-8", line_number)
+
+
+def _csv_rows(lines):
+    reader = csv.DictReader(lines)
+    try:
+        yield from reader
+    except csv.Error as exc:
+        # DictReader.line_num only advances after a good row; the underlying reader counts the failing line.
+        raise ImportFileError(f"Malformed CSV: {exc}", reader.reader.line_num)
+
+
+def _ndjson_rows(lines):
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def read_rows(stream, input_format):
+    lines = _decoded_lines(stream)
+    return _csv_rows(lines) if input_format == "csv" else _ndjson_rows(lines)
+
+
+def _clean_row(row):
+    if not isinstance(row, dict):
+        raise ValueError("Row is not a valid object")
+
+    values = {}
+    for column in IMPORT_COLUMNS:
+        value = row.get(column)
+        values[column] = "" if value is None else str(value).strip()
+
+    missing = [column for column in REQUIRED_COLUMNS if not values[column]]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)}")
+    for column, max_length in MAX_LENGTHS.items():
+        if len(values[column]) > max_length:
+            raise ValueError(f"{column} is longer than {max_length} characters")
+
+    category = values["category"].upper() or "BEAUTY_PRODUCTS"
+    if category not in CATEGORIES:
+        raise ValueError(f"Invalid category {values['category']}")
+
+    try:
+        price = Decimal(values["price"])
+    except InvalidOperation:
+        raise ValueError("price must be a number")
+    if not price.is_finite() or price < 0 or price >= MAX_PRICE:
+        raise ValueError("price is out of range")
+
+    try:
+        stock = int(values["stock"])
+    except ValueError:
+        raise ValueError("stock must be a whole number")
+    if stock < 0:
+        raise ValueError("stock must not be negative")
+
+    values.update(category=category, price=price.quantize(Decimal("0.01")), stock=stock)
+    return values
+
+
+@transaction.atomic
+def _upsert_chunk(rows, synced_at):
+    products = {
+        row["product_ref"]: Product(
+            external_id=row["product_ref"],
+            name=row["name"],
+            description=row["description"],
+            category=row["category"],
+            synced_at=synced_at,
+        )
+        for row in rows
+    }
+    Product.objects.bulk_create(
+        products.values(),
+        update_conflicts=True,
+        unique_fields=["external_id"],
+        update_fields=["name", "description", "category", "synced_at"],
+    )
+    product_ids = dict(Product.objects.filter(external_id__in=products).values_list("external_id", "id"))
+
+    variants = {
+        row["sku"]: ProductVariant(
+            product_id=product_ids[row["product_ref"]],
+            sku=row["sku"],
+            size=row["size"],
+            color=row["color"],
+            price=row["price"],
+            stock=row["stock"],
+            synced_at=synced_at,
+        )
+        for row in rows
+    }
+    previous = ProductVariant.objects.filter(sku__in=variants).values_list("sku", "stock", "product_id")
+    previous_stock = {}
+    previous_product = {}
+    for sku, stock, product_id in previous:
+        previous_stock[sku] = stock
+        previous_product[sku] = product_id
+    ProductVariant.objects.bulk_create(
+        variants.values(),
+        update_conflicts=True,
+        unique_fields=["sku"],
+        update_fields=["product", "size", "color", "price", "stock", "synced_at"],
+    )
+    variant_ids = dict(ProductVariant.objects.filter(sku__in=variants).values_list("sku", "id"))
+    record_stock_changes(
+        ((variant_ids[sku], previous_stock.get(sku), variant.stock) for sku, variant in variants.items()),
+        "import",
+    )
+
+    # _finish_import only refreshes products in the feed, so a product that lost a sku to another is done here.
+    left_ids = {
+        previous_product[sku]
+        for sku, variant in variants.items()
+        if previous_product.get(sku, variant.product_id) != variant.product_id
+    }
+    if left_ids:
+        refresh_variant_summaries(left_ids)
+    invalidate_catalog([*product_ids.values(), *left_ids])
+
+
+@transaction.atomic
+def _finish_import(synced_at, prune):
+    pruned = 0
+    if prune:
+        stale = ProductVariant.objects.filter(product__synced_at=synced_at).exclude(synced_at=synced_at)
+        _, deleted = stale.delete()
+        pruned = deleted.get(ProductVariant._meta.label, 0)
+
+    refresh_variant_summaries(Product.objects.filter(synced_at=synced_at).values("id"))
+    invalidate_catalog()
+    invalidate_search_index()
+    return pruned
+
+
+def import_products(rows, prune=True, chunk_size=IMPORT_CHUNK_SIZE):
+    started = time.monotonic()
+    synced_at = timezone.now()
+    report = {"rows": 0, "imported": 0, "pruned": 0, "error_count": 0, "errors": []}
+
+    chunk = []
+    try:
+        for line_number, row in enumerate(rows, start=1):
+            report["rows"] += 1
+            try:
+                chunk.append(_clean_row(row))
+            except ValueError as exc:
+                report["error_count"] += 1
+                if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                    report["errors"].append({"row": line_number, "error": str(exc)})
+                continue
+
+            if len(chunk) == chunk_size:
+                _upsert_chunk(chunk, synced_at)
+                report["imported"] += len(chunk)
+                chunk = []
+    except ImportFileError as exc:
+        # Earlier chunks are already committed; refresh their summaries but prune nothing from a partial feed.
+        _finish_import(synced_at, prune=False)
+        exc.imported = report["imported"]
+        raise
+
+    if chunk:
+        _upsert_chunk(chunk, synced_at)
+        report["imported"] += len(chunk)
+
+    report["pruned"] = _finish_import(synced_at, prune)
+
+    elapsed = time.monotonic() - started
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(report["rows"] / elapsed) if elapsed else report["rows"]
+    logger.info(
+        "product_import rows=%s imported=%s errors=%s pruned=%s duration_ms=%d rows_per_sec=%s",
+        report["rows"],
+        report["imported"],
+        report["error_count"],
+        report["pruned"],
+        elapsed * 1000,
+        report["rows_per_second"],
+    )
+    return report
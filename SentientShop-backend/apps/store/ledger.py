@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache import invalidate_catalog
+from .models import ProductVariant, StockMovement, StockSnapshot
+from .search import reindex_products
+from .summaries import refresh_variant_summaries
+
+# Movements younger than this may still belong to open transactions with lower ids, so compaction leaves them.
+SETTLE_DELAY = timedelta(minutes=5)
+
+
+def record_movement_rows(kind, rows):
+    StockMovement.objects.bulk_create(
+        [
+            StockMovement(variant_id=variant_id, kind=kind, quantity=quantity, reference=reference)
+            for variant_id, quantity, reference in rows
+            if quantity
+        ]
+    )
+
+
+def record_movements(kind, quantities, reference=""):
+    record_movement_rows(kind, [(variant_id, quantity, reference) for variant_id, quantity in quantities.items()])
+
+
+def record_stock_changes(changes, reference=""):
+    # changes: (variant_id, old_stock or None for a new variant, new_stock)
+    StockMovement.objects.bulk_create(
+        [
+            StockMovement(
+                variant_id=variant_id,
+                kind="RESTOCK" if old_stock is None else "ADJUSTMENT",
+                quantity=new_stock - (old_stock or 0),
+                reference=reference,
+            )
+            for variant_id, old_stock, new_stock in changes
+            if new_stock != (old_stock or 0)
+        ]
+    )
+
+
+def _movement_total(movements):
+    return Coalesce(
+        Subquery(movements.order_by().values("variant_id").annotate(total=Sum("quantity")).values("total")), 0
+    )
+
+
+@transaction.atomic
+def compact_ledger(retain_days=90, now=None):
+    now = now or timezone.now()
+    through_id = StockMovement.objects.filter(created_at__lt=now - SETTLE_DELAY).aggregate(last=Max("id"))["last"]
+    if through_id is None:
+        return 0, 0
+
+    StockSnapshot.objects.bulk_create(
+        [
+            StockSnapshot(variant_id=variant_id, stock=0)
+            for variant_id in ProductVariant.objects.filter(snapshot__isnull=True, movements__id__lte=through_id)
+            .values_list("id", flat=True)
+            .distinct()
+        ],
+        ignore_conflicts=True,
+    )
+    pending = StockMovement.objects.filter(
+        variant_id=OuterRef("variant_id"), id__gt=OuterRef("last_movement_id"), id__lte=through_id
+    )
+    rolled = StockSnapshot.objects.filter(Exists(pending)).update(
+        stock=F("stock") + _movement_total(pending), last_movement_id=through_id, taken_at=now
+    )
+    expired = StockMovement.objects.filter(id__lte=through_id, created_at__lt=now - timedelta(days=retain_days))
+    deleted, _ = expired.delete()
+    return rolled, deleted
+
+
+def ledger_drift(variant_ids=None):
+    variants = ProductVariant.objects.all()
+    if variant_ids is not None:
+        variants = variants.filter(id__in=variant_ids)
+    pending = StockMovement.objects.filter(
+        variant_id=OuterRef("pk"), id__gt=Coalesce(OuterRef("snapshot__last_movement_id"), 0)
+    )
+    return (
+        variants.annotate(ledger_stock=Coalesce(F("snapshot__stock"), 0) + _movement_total(pending))
+        .exclude(stock=F("ledger_stock"))
+        .values_list("id", "stock", "ledger_stock")
+    )
+
+
+@transaction.atomic
+def rebuild_stock(variant_ids=None):
+    drift = list(ledger_drift(variant_ids))
+    ProductVariant.objects.bulk_update(
+        [ProductVariant(id=variant_id, stock=max(ledger_stock, 0)) for variant_id, _, ledger_stock in drift],
+        ["stock"],
+    )
+    product_ids = set(
+        ProductVariant.objects.filter(id__in=[variant_id for variant_id, _, _ in drift]).values_list(
+            "product_id", flat=True
+        )
+    )
+    refresh_variant_summaries(product_ids)
+    invalidate_catalog(product_ids)
+    reindex_products(product_ids)
+    return drift
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.store.ledger import compact_ledger
+
+
+class Command(BaseCommand):
+    help = "Roll settled stock movements into per-variant snapshots and drop movements past retention."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--retain-days", type=int, default=90)
+
+    def handle(self, *args, **options):
+        rolled, deleted = compact_ledger(retain_days=options["retain_days"])
+        self.stdout.write(self.style.SUCCESS(f"Updated {rolled} snapshots, deleted {deleted} old movements"))
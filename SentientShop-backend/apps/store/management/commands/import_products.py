@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.store.imports import IMPORT_CHUNK_SIZE, IMPORT_FORMATS, ImportFileError, import_products, read_rows
+
+
+class Command(BaseCommand):
+    help = "Upsert products and variants from a CSV or NDJSON supplier feed keyed by product_ref and sku."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--input", choices=sorted(IMPORT_FORMATS))
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+        parser.add_argument("--no-prune", action="store_true", help="Keep variants that are missing from the feed.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["input"] or path.rsplit(".", 1)[-1].lower()
+        if input_format not in IMPORT_FORMATS:
+            raise CommandError(f"Cannot tell the input format of {path}; pass --input")
+
+        with open(path, "rb") as stream:
+            try:
+                report = import_products(
+                    read_rows(stream, input_format),
+                    prune=not options["no_prune"],
+                    chunk_size=options["chunk_size"],
+                )
+            except ImportFileError as exc:
+                raise CommandError(f"line {exc.line}: {exc} ({exc.imported} rows imported before it)")
+
+        for error in report["errors"]:
+            self.stderr.write(f"row {error['row']}: {error['error']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report['imported']} of {report['rows']} rows, pruned {report['pruned']} variants "
+                f"in {report['seconds']}s ({report['rows_per_second']} rows/s)"
+            )
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.store.cache import invalidate_catalog
+from apps.store.models import Product
+from apps.store.summaries import refresh_product_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized price, stock, rating and sales summaries on every product."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        product_ids = list(Product.objects.order_by("id").values_list("id", flat=True))
+
+        updated = 0
+        for start in range(0, len(product_ids), batch_size):
+            batch = product_ids[start : start + batch_size]
+            with transaction.atomic():
+                updated += refresh_product_summaries(batch)
+                invalidate_catalog()
+
+        self.stdout.write(self.style.SUCCESS(f"Refreshed summaries for {updated} products"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.store.ledger import ledger_drift, rebuild_stock
+
+
+class Command(BaseCommand):
+    help = "Compare each variant's stock with its snapshot plus later movements."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Reset drifted variants to the ledger stock.")
+
+    def handle(self, *args, **options):
+        drift = rebuild_stock() if options["rebuild"] else list(ledger_drift())
+        for variant_id, stock, ledger_stock in drift:
+            self.stdout.write(f"variant {variant_id}: stock={stock} ledger={ledger_stock}")
+
+        action = "Rebuilt" if options["rebuild"] else "Found"
+        self.stdout.write(self.style.SUCCESS(f"{action} {len(drift)} drifted variants"))
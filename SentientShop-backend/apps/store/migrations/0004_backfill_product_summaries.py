@@ -0,0 +1,52 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Avg, Count, DecimalField, Max, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def _per_product(queryset, product_field, aggregate):
+    return Subquery(
+        queryset.filter(**{product_field: OuterRef("pk")})
+        .order_by()
+        .values(product_field)
+        .annotate(value=aggregate)
+        .values("value")
+    )
+
+
+def backfill_summaries(apps, schema_editor):
+    Product = apps.get_model("store", "Product")
+    ProductVariant = apps.get_model("store", "ProductVariant")
+    Review = apps.get_model("reviews", "Review")
+    OrderItem = apps.get_model("orders", "OrderItem")
+
+    variants = ProductVariant.objects.all()
+    reviews = Review.objects.all()
+    items = OrderItem.objects.filter(order__status__in=["PAID", "SHIPPED", "DELIVERED"])
+    Product.objects.update(
+        min_price=_per_product(variants, "product_id", Min("price")),
+        max_price=_per_product(variants, "product_id", Max("price")),
+        total_stock=Coalesce(_per_product(variants, "product_id", Sum("stock")), 0),
+        avg_rating=Coalesce(
+            _per_product(
+                reviews, "product_id", Avg("rating", output_field=DecimalField(max_digits=3, decimal_places=2))
+            ),
+            Value(Decimal("0")),
+        ),
+        review_count=Coalesce(_per_product(reviews, "product_id", Count("id")), 0),
+        units_sold=Coalesce(_per_product(items, "variant__product_id", Sum("quantity")), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0003_product_summaries"),
+        ("reviews", "0001_initial"),
+        ("orders", "0004_order_admin_feed_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-18 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0004_backfill_product_summaries"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="external_id",
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="synced_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="productvariant",
+            name="sku",
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name="productvariant",
+            name="synced_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def seed_snapshots(apps, schema_editor):
+    ProductVariant = apps.get_model("store", "ProductVariant")
+    StockSnapshot = apps.get_model("store", "StockSnapshot")
+
+    StockSnapshot.objects.bulk_create(
+        (
+            StockSnapshot(variant_id=variant_id, stock=stock)
+            for variant_id, stock in ProductVariant.objects.values_list("id", "stock").iterator(chunk_size=5000)
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0006_stock_ledger"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_snapshots, migrations.RunPython.noop),
+    ]
@@ -11,6 +11,18 @@ class Product(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField()
     category = models.CharField(max_length=40, choices=CATEGORY_CHOICES, default="BEAUTY_PRODUCTS")
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    synced_at = models.DateTimeField(null=True, blank=True)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    total_stock = models.PositiveIntegerField(default=0)
+    avg_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    units_sold = models.PositiveIntegerField(default=0)
+
+    @property
+    def in_stock(self):
+        return self.total_stock > 0
 
 class ProductVariant(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="variants")
@@ -18,3 +30,32 @@ class ProductVariant(models.Model):
     color = models.CharField(max_length=20)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField()
+    sku = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    synced_at = models.DateTimeField(null=True, blank=True)
+
+
+class StockMovement(models.Model):
+    KIND_CHOICES = [
+        ("SALE", "Sale"),
+        ("RESTOCK", "Restock"),
+        ("RELEASE", "Cancellation release"),
+        ("ADJUSTMENT", "Admin adjustment"),
+    ]
+
+    variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, related_name="movements")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    quantity = models.IntegerField()
+    reference = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["variant", "-id"], name="stock_movement_variant_idx"),
+        ]
+
+
+class StockSnapshot(models.Model):
+    variant = models.OneToOneField(ProductVariant, on_delete=models.CASCADE, primary_key=True, related_name="snapshot")
+    stock = models.IntegerField()
+    last_movement_id = models.BigIntegerField(default=0)
+    taken_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,353 @@
+import heapq
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from itertools import chain
+from decimal import Decimal
+
+from django.db import transaction
+
+from .cache import bump_version, get_version
+from .models import Product, ProductVariant
+
+SEARCH_VERSION_KEY = "search:version"
+
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_AGE = 300
+
+FIELD_WEIGHTS = {"name": 3.0, "category": 2.0, "variant": 1.5, "description": 1.0}
+
+PRICE_BUCKETS = [
+    (Decimal("0"), Decimal("500")),
+    (Decimal("500"), Decimal("1000")),
+    (Decimal("1000"), Decimal("2500")),
+    (Decimal("2500"), Decimal("5000")),
+    (Decimal("5000"), None),
+]
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+CATEGORY_LABELS = dict(Product.CATEGORY_CHOICES)
+
+
+def tokenize(text):
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        # Cheap plural folding so "headphones" and "headphone" share a term.
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class _Document:
+    __slots__ = (
+        "product_id",
+        "terms",
+        "length",
+        "category",
+        "sizes",
+        "colors",
+        "prices",
+        "stocked_prices",
+        "price_buckets",
+    )
+
+    def __init__(self, product, variants):
+        weights = Counter()
+        for field, text in (
+            ("name", product["name"]),
+            ("category", f"{product['category']} {CATEGORY_LABELS.get(product['category'], '')}"),
+            ("description", product["description"]),
+        ):
+            for token in tokenize(text):
+                weights[token] += FIELD_WEIGHTS[field]
+
+        variant_tokens = set()
+        for variant in variants:
+            variant_tokens.update(tokenize(f"{variant['size']} {variant['color']}"))
+        for token in variant_tokens:
+            weights[token] += FIELD_WEIGHTS["variant"]
+
+        self.product_id = product["id"]
+        self.terms = dict(weights)
+        self.length = sum(weights.values())
+        self.category = product["category"]
+        self.sizes = {variant["size"] for variant in variants}
+        self.colors = {variant["color"] for variant in variants}
+        self.prices = [variant["price"] for variant in variants]
+        self.stocked_prices = [variant["price"] for variant in variants if variant["stock"] > 0]
+        self.price_buckets = {
+            position
+            for position, (low, high) in enumerate(PRICE_BUCKETS)
+            for price in self.prices
+            if price >= low and (high is None or price < high)
+        }
+
+    def matches(self, category=None, size=None, color=None, min_price=None, max_price=None, in_stock=None):
+        if category and self.category not in category:
+            return False
+        if size and not self.sizes & size:
+            return False
+        if color and not self.colors & color:
+            return False
+        # Like the product list, in_stock with a price range needs one variant that is both stocked and in range.
+        prices = self.stocked_prices if in_stock else self.prices
+        if in_stock and not prices:
+            return False
+        if min_price is not None or max_price is not None:
+            return any(
+                (min_price is None or price >= min_price) and (max_price is None or price <= max_price)
+                for price in prices
+            )
+        return True
+
+
+class SearchIndex:
+    def __init__(self, version=None):
+        self.version = version
+        self.postings = defaultdict(dict)
+        self.documents = {}
+        self.total_length = 0
+        self.lock = threading.RLock()
+
+    def add(self, product, variants):
+        document = _Document(product, variants)
+        with self.lock:
+            self.remove(document.product_id)
+            self.documents[document.product_id] = document
+            self.total_length += document.length
+            for term, weight in document.terms.items():
+                self.postings[term][document.product_id] = weight
+
+    def remove(self, product_id):
+        with self.lock:
+            document = self.documents.pop(product_id, None)
+            if document is None:
+                return
+
+            self.total_length -= document.length
+            for term in document.terms:
+                postings = self.postings[term]
+                postings.pop(product_id, None)
+                if not postings:
+                    del self.postings[term]
+
+    def _score(self, terms):
+        postings = [self.postings.get(term) for term in dict.fromkeys(terms)]
+        if not all(postings):
+            return {}
+
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        total_documents = len(self.documents)
+        average_length = self.total_length / total_documents
+        norms = {
+            product_id: BM25_K1 * (1 - BM25_B + BM25_B * self.documents[product_id].length / average_length)
+            for product_id in candidates
+        }
+
+        scores = dict.fromkeys(candidates, 0.0)
+        for term_postings in postings:
+            idf = math.log(1 + (total_documents - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+            boost = idf * (BM25_K1 + 1)
+            for product_id in candidates:
+                tf = term_postings[product_id]
+                scores[product_id] += boost * tf / (tf + norms[product_id])
+        return scores
+
+    def search(self, query, offset=0, limit=24, **filters):
+        terms = tokenize(query)
+        filtered = any(value is not None for value in filters.values())
+        with self.lock:
+            scores = self._score(terms) if terms else None
+            candidates = self.documents if scores is None else scores
+            matches = [self.documents[product_id] for product_id in candidates]
+            if filtered:
+                matches = [document for document in matches if document.matches(**filters)]
+            facets = _facets(matches)
+
+        # Only the requested page needs ordering; ties and the empty query fall back to product id.
+        if scores:
+            page = heapq.nsmallest(
+                offset + limit,
+                matches,
+                key=lambda document: (-scores[document.product_id], document.product_id),
+            )
+            page_ids = [document.product_id for document in page]
+        else:
+            page_ids = heapq.nsmallest(offset + limit, (document.product_id for document in matches))
+        return len(matches), page_ids[offset:], facets
+
+
+def _facets(documents):
+    price_counts = Counter(chain.from_iterable(document.price_buckets for document in documents))
+    return {
+        "category": dict(Counter(document.category for document in documents).most_common()),
+        "size": dict(Counter(chain.from_iterable(document.sizes for document in documents)).most_common()),
+        "color": dict(Counter(chain.from_iterable(document.colors for document in documents)).most_common()),
+        "price": [
+            {"min": low, "max": high, "count": price_counts[position]}
+            for position, (low, high) in enumerate(PRICE_BUCKETS)
+        ],
+    }
+
+
+def _load_documents(product_ids=None):
+    products = Product.objects.values("id", "name", "description", "category")
+    variants = ProductVariant.objects.values("product_id", "size", "color", "price", "stock")
+    if product_ids is not None:
+        products = products.filter(id__in=product_ids)
+        variants = variants.filter(product_id__in=product_ids)
+
+    variants_by_product = defaultdict(list)
+    for variant in variants.iterator(chunk_size=5000):
+        variants_by_product[variant["product_id"]].append(variant)
+    for product in products.iterator(chunk_size=5000):
+        yield product, variants_by_product.get(product["id"], [])
+
+
+def build_index():
+    index = SearchIndex(get_version(SEARCH_VERSION_KEY))
+    for product, variants in _load_documents():
+        index.add(product, variants)
+    return index
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    # Other workers bump the shared version on catalog writes; a mismatch means this copy is stale.
+    version = get_version(SEARCH_VERSION_KEY)
+    if _index is None or _index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = build_index()
+    return _index
+
+
+def _reindex(product_ids):
+    version = bump_version(SEARCH_VERSION_KEY)
+    index = _index
+    if index is None or index.version is None or version != index.version + 1:
+        # Another writer got in between; get_index() will rebuild on the next search.
+        return
+
+    with index.lock:
+        for product_id in product_ids:
+            index.remove(product_id)
+        for product, variants in _load_documents(product_ids):
+            index.add(product, variants)
+        index.version = version
+
+
+def reindex_products(product_ids):
+    product_ids = sorted(set(product_ids))
+    if product_ids:
+        transaction.on_commit(lambda: _reindex(product_ids))
+
+
+def invalidate_search_index():
+    transaction.on_commit(lambda: bump_version(SEARCH_VERSION_KEY))
+
+
+def search_products(query, offset=0, limit=24, **filters):
+    return get_index().search(query, offset=offset, limit=limit, **filters)
+
+
+class SuggestionIndex:
+    # Sorted (key, product_id) pairs, one per word start of each product name, searched with bisect.
+    def __init__(self, version, products, popularity):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.popularity = popularity
+        self.products = {product["id"]: product for product in products}
+
+        entries = []
+        for product in products:
+            words = product["name"].lower().split()
+            entries.extend((" ".join(words[position:]), product["id"]) for position in range(len(words)))
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.product_ids = [product_id for _, product_id in entries]
+
+        category_units = Counter()
+        for product in products:
+            category_units[product["category"]] += popularity.get(product["id"], 0)
+        self.categories = sorted(
+            Product.CATEGORY_CHOICES, key=lambda item: (-category_units[item[0]], item[1])
+        )
+
+        # One- and two-character prefixes match too much of the catalog to rank per request,
+        # so their top suggestions are filled in popularity order up front.
+        self.short_prefixes = defaultdict(list)
+        for product_id in sorted(self.products, key=self._popularity_key, reverse=True):
+            for word in {key[:2] for key in self.products[product_id]["name"].lower().split()}:
+                for prefix in (word[:1], word):
+                    ranked = self.short_prefixes[prefix]
+                    if len(ranked) < AUTOCOMPLETE_LIMIT and (not ranked or ranked[-1] != product_id):
+                        ranked.append(product_id)
+
+    def _popularity_key(self, product_id):
+        return self.popularity.get(product_id, 0), -product_id
+
+    def _rank(self, product_ids, limit):
+        return heapq.nlargest(limit, set(product_ids), key=self._popularity_key)
+
+    def suggest(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        prefix = " ".join(prefix.lower().split())
+        if not prefix:
+            return [], []
+
+        if len(prefix) <= 2:
+            product_ids = self.short_prefixes.get(prefix, [])[:limit]
+        else:
+            low = bisect_left(self.keys, prefix)
+            high = bisect_left(self.keys, prefix + "\uffff", low)
+            product_ids = self._rank(self.product_ids[low:high], limit)
+
+        categories = [
+            {"value": value, "label": label}
+            for value, label in self.categories
+            if any(word.startswith(prefix) for word in [label.lower(), *label.lower().split()])
+        ]
+        products = [
+            {
+                "id": product_id,
+                "name": self.products[product_id]["name"],
+                "category": self.products[product_id]["category"],
+                "units_sold": self.popularity.get(product_id, 0),
+            }
+            for product_id in product_ids
+        ]
+        return products, categories
+
+
+_suggestions = None
+
+
+def get_suggestion_index():
+    global _suggestions
+    version = get_version(SEARCH_VERSION_KEY)
+    suggestions = _suggestions
+    if (
+        suggestions is None
+        or suggestions.version != version
+        or time.monotonic() - suggestions.built_at > AUTOCOMPLETE_MAX_AGE
+    ):
+        products = list(Product.objects.values("id", "name", "category", "units_sold"))
+        popularity = {product["id"]: product["units_sold"] for product in products}
+        suggestions = _suggestions = SuggestionIndex(version, products, popularity)
+    return suggestions
+
+
+def autocomplete(prefix, limit=AUTOCOMPLETE_LIMIT):
+    return get_suggestion_index().suggest(prefix, min(limit, AUTOCOMPLETE_LIMIT))
@@ -1,17 +1,42 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Product, ProductVariant
+from .models import Product, ProductVariant, StockMovement
+from .ledger import record_stock_changes
+from .summaries import refresh_variant_summaries
 
 class VariantSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProductVariant
-        fields = "__all__"
+        fields = ["id", "product", "sku", "size", "color", "price", "stock"]
 
 class ProductSerializer(serializers.ModelSerializer):
     variants = VariantSerializer(many=True)
+    in_stock = serializers.BooleanField(read_only=True)
 
     class Meta:
         model = Product
-        fields = "__all__"
+        fields = [
+            "id",
+            "name",
+            "description",
+            "category",
+            "variants",
+            "min_price",
+            "max_price",
+            "total_stock",
+            "in_stock",
+            "avg_rating",
+            "review_count",
+            "units_sold",
+        ]
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
 
 class AdminVariantSerializer(serializers.ModelSerializer):
@@ -19,7 +44,9 @@ class AdminVariantSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ProductVariant
-        fields = ["id", "size", "color", "price", "stock"]
+        fields = ["id", "sku", "size", "color", "price", "stock"]
+        # A nested serializer has no instance to exclude, so AdminProductSerializer checks sku uniqueness.
+        extra_kwargs = {"sku": {"validators": []}}
 
 
 class AdminProductSerializer(serializers.ModelSerializer):
@@ -27,40 +54,93 @@ class AdminProductSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
-        fields = ["id", "name", "description", "category", "variants"]
+        fields = ["id", "external_id", "name", "description", "category", "variants"]
+
+    def validate_variants(self, value):
+        skus = []
+        for variant_data in value:
+            if "sku" in variant_data:
+                variant_data["sku"] = variant_data["sku"] or None
+                if variant_data["sku"]:
+                    skus.append(variant_data["sku"])
+        if len(skus) != len(set(skus)):
+            raise serializers.ValidationError("Each variant needs a different sku.")
+
+        if skus:
+            # Variants of this product are either kept or removed by the update, so only other products can clash.
+            taken = ProductVariant.objects.filter(sku__in=skus)
+            if self.instance is not None:
+                taken = taken.exclude(product=self.instance)
+            taken = sorted(taken.values_list("sku", flat=True))
+            if taken:
+                raise serializers.ValidationError(f"sku already used by another product: {', '.join(taken)}")
+        return value
 
+    @transaction.atomic
     def create(self, validated_data):
         variants_data = validated_data.pop("variants", [])
         product = Product.objects.create(**validated_data)
-        for variant_data in variants_data:
-            ProductVariant.objects.create(product=product, **variant_data)
+        variants = ProductVariant.objects.bulk_create(
+            [ProductVariant(product=product, **variant_data) for variant_data in variants_data]
+        )
+        record_stock_changes(((variant.id, None, variant.stock) for variant in variants), "admin")
+        refresh_variant_summaries([product.id])
         return product
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         variants_data = validated_data.pop("variants", None)
-        instance.name = validated_data.get("name", instance.name)
-        instance.description = validated_data.get("description", instance.description)
-        instance.category = validated_data.get("category", instance.category)
-        instance.save()
-
-        if variants_data is not None:
-            existing_by_id = {variant.id: variant for variant in instance.variants.all()}
-            seen_ids = set()
-
-            for variant_data in variants_data:
-                variant_id = variant_data.pop("id", None)
-                if variant_id and variant_id in existing_by_id:
-                    variant = existing_by_id[variant_id]
-                    for field, value in variant_data.items():
-                        setattr(variant, field, value)
-                    variant.save()
-                    seen_ids.add(variant_id)
-                else:
-                    created = ProductVariant.objects.create(product=instance, **variant_data)
-                    seen_ids.add(created.id)
-
-            for variant in instance.variants.all():
-                if variant.id not in seen_ids:
-                    variant.delete()
+        changed = [field for field, value in validated_data.items() if getattr(instance, field) != value]
+        for field in changed:
+            setattr(instance, field, validated_data[field])
+        if changed:
+            instance.save(update_fields=changed)
+
+        if variants_data is not None and self._sync_variants(instance, variants_data):
+            refresh_variant_summaries([instance.id])
+            instance._prefetched_objects_cache = {}
 
         return instance
+
+    def _sync_variants(self, instance, variants_data):
+        existing = {variant.id: variant for variant in instance.variants.all()}
+        kept_ids = set()
+        to_create = []
+        to_update = []
+        update_fields = set()
+        stock_changes = []
+
+        for variant_data in variants_data:
+            variant = existing.get(variant_data.pop("id", None))
+            if variant is None:
+                to_create.append(ProductVariant(product=instance, **variant_data))
+                continue
+
+            kept_ids.add(variant.id)
+            changed = {field for field, value in variant_data.items() if getattr(variant, field) != value}
+            if "stock" in changed:
+                stock_changes.append((variant.id, variant.stock, variant_data["stock"]))
+            for field in changed:
+                setattr(variant, field, variant_data[field])
+            if changed and variant not in to_update:
+                to_update.append(variant)
+            update_fields |= changed
+
+        # Removed variants go first so a new variant can reuse a removed variant's sku.
+        stale_ids = existing.keys() - kept_ids
+        if stale_ids:
+            ProductVariant.objects.filter(id__in=stale_ids).delete()
+        if update_fields:
+            ProductVariant.objects.bulk_update(to_update, sorted(update_fields))
+        if to_create:
+            ProductVariant.objects.bulk_create(to_create)
+            stock_changes.extend((variant.id, None, variant.stock) for variant in to_create)
+        record_stock_changes(stock_changes, "admin")
+
+        return bool(stale_ids or update_fields or to_create)
+
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StockMovement
+        fields = ["id", "kind", "quantity", "reference", "created_at"]
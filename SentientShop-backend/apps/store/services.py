@@ -0,0 +1,67 @@
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+from .cache import invalidate_catalog
+from .ledger import record_movement_rows, record_movements
+from .models import ProductVariant
+from .search import reindex_products
+from .summaries import refresh_variant_summaries
+
+
+class InsufficientStock(Exception):
+    pass
+
+
+def _quantity_case(quantities):
+    return Case(
+        *[When(id=variant_id, then=Value(quantity)) for variant_id, quantity in quantities.items()],
+        output_field=PositiveIntegerField(),
+    )
+
+
+def _stock_changed(quantities, sold):
+    product_ids = set()
+    crossed_ids = set()
+    for variant_id, product_id, stock in ProductVariant.objects.filter(id__in=quantities).values_list(
+        "id", "product_id", "stock"
+    ):
+        product_ids.add(product_id)
+        # Only a variant that sold out or came back changes in-stock search results, so only those reindex.
+        if stock == (0 if sold else quantities[variant_id]):
+            crossed_ids.add(product_id)
+    refresh_variant_summaries(product_ids)
+    invalidate_catalog(product_ids)
+    if crossed_ids:
+        reindex_products(crossed_ids)
+
+
+def reserve_stock(quantities, reference=""):
+    if not quantities:
+        return
+
+    # One conditional UPDATE for every variant; a short row rolls back the whole reservation.
+    amount = _quantity_case(quantities)
+    with transaction.atomic():
+        updated = ProductVariant.objects.filter(id__in=quantities, stock__gte=amount).update(
+            stock=F("stock") - amount
+        )
+        if updated != len(quantities):
+            raise InsufficientStock()
+
+        record_movements("SALE", {variant_id: -quantity for variant_id, quantity in quantities.items()}, reference)
+        _stock_changed(quantities, sold=True)
+
+
+def release_stock(quantities, reference="", movements=None):
+    # movements: optional (variant_id, quantity, reference) ledger rows, e.g. one per order in a batch release.
+    if not quantities:
+        return
+
+    amount = _quantity_case(quantities)
+    with transaction.atomic():
+        ProductVariant.objects.filter(id__in=quantities).update(stock=F("stock") + amount)
+        if movements is None:
+            record_movements("RELEASE", quantities, reference)
+        else:
+            record_movement_rows("RELEASE", movements)
+        _stock_changed(quantities, sold=False)
@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+from django.db.models import Avg, Case, Count, DecimalField, F, IntegerField, Max, Min, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Product, ProductVariant
+
+RATING_FIELD = DecimalField(max_digits=3, decimal_places=2)
+
+
+def _per_product(queryset, product_field, aggregate):
+    return Subquery(
+        queryset.filter(**{product_field: OuterRef("pk")})
+        .order_by()
+        .values(product_field)
+        .annotate(value=aggregate)
+        .values("value")
+    )
+
+
+def _variant_summary():
+    variants = ProductVariant.objects.all()
+    return {
+        "min_price": _per_product(variants, "product_id", Min("price")),
+        "max_price": _per_product(variants, "product_id", Max("price")),
+        "total_stock": Coalesce(_per_product(variants, "product_id", Sum("stock")), 0),
+    }
+
+
+def _review_summary():
+    from apps.reviews.models import Review
+
+    reviews = Review.objects.all()
+    return {
+        "avg_rating": Coalesce(
+            _per_product(reviews, "product_id", Avg("rating", output_field=RATING_FIELD)), Value(Decimal("0"))
+        ),
+        "review_count": Coalesce(_per_product(reviews, "product_id", Count("id")), 0),
+    }
+
+
+def _sales_summary():
+    from apps.orders.models import Order, OrderItem
+
+    items = OrderItem.objects.filter(order__status__in=Order.PURCHASED_STATUSES)
+    return {"units_sold": Coalesce(_per_product(items, "variant__product_id", Sum("quantity")), 0)}
+
+
+def _products(product_ids):
+    if product_ids is None:
+        return Product.objects.all()
+    return Product.objects.filter(id__in=product_ids)
+
+
+def refresh_variant_summaries(product_ids):
+    _products(product_ids).update(**_variant_summary())
+
+
+def refresh_review_summaries(product_ids):
+    _products(product_ids).update(**_review_summary())
+
+
+def refresh_product_summaries(product_ids=None):
+    return _products(product_ids).update(**_variant_summary(), **_review_summary(), **_sales_summary())
+
+
+def adjust_product_counter(field, deltas):
+    deltas = {product_id: delta for product_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    change = Case(
+        *[When(id=product_id, then=Value(delta)) for product_id, delta in deltas.items()],
+        output_field=IntegerField(),
+    )
+    Product.objects.filter(id__in=deltas).update(**{field: Greatest(F(field) + change, 0)})
@@ -0,0 +1,233 @@
+import io
+import json
+import math
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection
+from django.http import JsonResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import include, path
+
+from core.instrumentation import NPlusOneQueries
+
+from .imports import IMPORT_COLUMNS, ImportFileError, import_products, read_rows
+from .models import Product, ProductVariant, StockMovement
+from .search import SearchIndex
+from .serializers import AdminProductSerializer
+
+VARIANT_COUNT = 200
+
+
+def _variant_payload(index, **overrides):
+    return {
+        "sku": f"TEE-{index:03d}",
+        "size": ["S", "M", "L", "XL"][index % 4],
+        "color": f"color{index // 4}",
+        "price": "499.00",
+        "stock": 10,
+        **overrides,
+    }
+
+
+def _insert_batches(model, count):
+    # bulk_create splits on backends with a bound-parameter limit (SQLite); Postgres sends one INSERT.
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    return math.ceil(count / connection.ops.bulk_batch_size(fields, [None] * count))
+
+
+def _variant_counts(request):
+    # No prefetch: one COUNT query per product.
+    return JsonResponse({product.id: product.variants.count() for product in Product.objects.all()})
+
+
+def _import_row(product_ref, sku, stock=10, **overrides):
+    return {
+        "product_ref": product_ref,
+        "name": f"Product {product_ref}",
+        "description": "",
+        "category": "CLOTHS",
+        "sku": sku,
+        "size": "M",
+        "color": "blue",
+        "price": "299.00",
+        "stock": stock,
+        **overrides,
+    }
+
+
+def _csv_file(rows):
+    lines = [",".join(IMPORT_COLUMNS)] + [",".join(str(row[column]) for column in IMPORT_COLUMNS) for row in rows]
+    return "\n".join(lines).encode() + b"\n"
+
+
+def _ndjson_file(rows):
+    return b"".join(json.dumps(row).encode() + b"\n" for row in rows)
+
+
+urlpatterns = [
+    path("variant-counts/", _variant_counts),
+    path("", include("core.urls")),
+]
+
+
+class AdminProductSerializerQueryTests(TestCase):
+    def _create(self):
+        serializer = AdminProductSerializer(
+            data={
+                "name": "Basic tee",
+                "description": "Cotton",
+                "category": "CLOTHS",
+                "variants": [_variant_payload(index) for index in range(VARIANT_COUNT)],
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def _update(self, product, variants):
+        serializer = AdminProductSerializer(product, data={"variants": variants}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def _reload(self, product):
+        return Product.objects.prefetch_related("variants").get(id=product.id)
+
+    def test_create_with_many_variants(self):
+        # sku check, savepoint pair, product insert, variant insert, ledger insert, summary refresh
+        expected = 5 + _insert_batches(ProductVariant, VARIANT_COUNT) + _insert_batches(StockMovement, VARIANT_COUNT)
+        with self.assertNumQueries(expected):
+            product = self._create()
+
+        self.assertEqual(product.variants.count(), VARIANT_COUNT)
+        product.refresh_from_db()
+        self.assertEqual(product.total_stock, VARIANT_COUNT * 10)
+
+    def test_unchanged_update_writes_nothing(self):
+        product = self._reload(self._create())
+        variants = AdminProductSerializer(product).data["variants"]
+
+        # sku check and the savepoint pair around update(); every variant matches what is stored.
+        with self.assertNumQueries(3):
+            self._update(product, variants)
+
+    def test_update_adds_changes_and_removes_variants(self):
+        product = self._reload(self._create())
+        variants = AdminProductSerializer(product).data["variants"]
+        kept = variants[50:]
+        for variant in kept[:100]:
+            variant["stock"] += 5
+        for variant in kept[100:]:
+            variant["price"] = "549.00"
+        added = [_variant_payload(index) for index in range(VARIANT_COUNT, VARIANT_COUNT + 50)]
+
+        # sku check, savepoint pair, one delete of 50 variants (a select plus one query per related table),
+        # bulk update, bulk insert, ledger insert, summary refresh
+        with self.assertNumQueries(14):
+            self._update(product, kept + added)
+
+        self.assertEqual(product.variants.count(), VARIANT_COUNT)
+        self.assertFalse(ProductVariant.objects.filter(sku__in=[v["sku"] for v in variants[:50]]).exists())
+        self.assertEqual(product.variants.filter(stock=15).count(), 100)
+        self.assertEqual(product.variants.filter(price="549.00").count(), 50)
+
+
+class SearchInStockTests(SimpleTestCase):
+    def setUp(self):
+        self.index = SearchIndex()
+        for product_id, variants in (
+            (1, [("S", 0, "300"), ("M", 4, "900")]),
+            (2, [("S", 0, "300")]),
+            (3, [("S", 2, "300")]),
+        ):
+            self.index.add(
+                {"id": product_id, "name": "Denim jacket", "description": "", "category": "CLOTHS"},
+                [
+                    {"product_id": product_id, "size": size, "color": "blue", "stock": stock, "price": Decimal(price)}
+                    for size, stock, price in variants
+                ],
+            )
+
+    def test_in_stock_drops_products_without_stocked_variants(self):
+        count, page_ids, facets = self.index.search("jacket", in_stock=True)
+
+        self.assertEqual((count, sorted(page_ids)), (2, [1, 3]))
+        self.assertEqual(facets["category"], {"CLOTHS": 2})
+
+    def test_in_stock_price_range_needs_one_variant_matching_both(self):
+        count, page_ids, _ = self.index.search("jacket", in_stock=True, max_price=Decimal("500"))
+
+        self.assertEqual((count, page_ids), (1, [3]))
+
+
+class ProductImportTests(TestCase):
+    def _import(self, rows, input_format="csv", **kwargs):
+        data = _csv_file(rows) if input_format == "csv" else _ndjson_file(rows)
+        return import_products(read_rows(io.BytesIO(data), input_format), **kwargs)
+
+    def _skus(self):
+        return dict(ProductVariant.objects.values_list("sku", "product__external_id"))
+
+    def test_reimporting_the_same_file_updates_in_place(self):
+        rows = [_import_row("P1", "P1-M"), _import_row("P1", "P1-L", size="L"), _import_row("P2", "P2-M")]
+        self._import(rows)
+        variant_ids = set(ProductVariant.objects.values_list("id", flat=True))
+        movements = StockMovement.objects.count()
+
+        report = self._import(rows)
+
+        self.assertEqual(report["imported"], 3)
+        self.assertEqual(report["pruned"], 0)
+        self.assertEqual(Product.objects.count(), 2)
+        self.assertEqual(set(ProductVariant.objects.values_list("id", flat=True)), variant_ids)
+        self.assertEqual(StockMovement.objects.count(), movements)
+
+    def test_prune_removes_variants_missing_from_the_file(self):
+        self._import([_import_row("P1", "P1-M"), _import_row("P1", "P1-L", size="L"), _import_row("P2", "P2-M")])
+
+        report = self._import([_import_row("P1", "P1-M"), _import_row("P2", "P2-M")])
+
+        self.assertEqual(report["pruned"], 1)
+        self.assertEqual(self._skus(), {"P1-M": "P1", "P2-M": "P2"})
+        self.assertEqual(Product.objects.get(external_id="P1").total_stock, 10)
+
+    def test_sku_moves_between_products(self):
+        self._import([_import_row("P1", "P1-M", stock=4), _import_row("P1", "SHARED", stock=6)])
+
+        self._import([_import_row("P2", "SHARED", stock=6)])
+
+        self.assertEqual(self._skus(), {"P1-M": "P1", "SHARED": "P2"})
+        self.assertEqual(Product.objects.get(external_id="P1").total_stock, 4)
+        self.assertEqual(Product.objects.get(external_id="P2").total_stock, 6)
+
+    def test_file_error_reports_line_and_committed_rows(self):
+        # CSV counts its header as line 1; the third row is read but its chunk never fills, so it is not committed.
+        for input_format, to_file, line in (("csv", _csv_file, 5), ("ndjson", _ndjson_file, 4)):
+            with self.subTest(input_format=input_format):
+                skus = [f"{input_format}-{index}" for index in range(3)]
+                data = to_file([_import_row(input_format, sku) for sku in skus]) + b"\xff bad line\n"
+
+                with self.assertRaises(ImportFileError) as caught:
+                    import_products(read_rows(io.BytesIO(data), input_format), chunk_size=2)
+
+                self.assertEqual(caught.exception.line, line)
+                self.assertEqual(caught.exception.imported, 2)
+                committed = ProductVariant.objects.filter(sku__in=skus).values_list("sku", flat=True)
+                self.assertEqual(sorted(committed), skus[:2])
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class NPlusOneDetectionTests(TestCase):
+    def setUp(self):
+        for index in range(settings.N_PLUS_ONE_THRESHOLD):
+            product = Product.objects.create(name=f"Tee {index}", description="Cotton")
+            ProductVariant.objects.create(product=product, size="M", color="red", price="499.00", stock=1)
+
+    def test_repeated_query_fails_the_request(self):
+        with self.assertRaises(NPlusOneQueries):
+            self.client.get("/variant-counts/")
+
+    def test_prefetched_product_list_passes(self):
+        response = self.client.get("/api/products/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), settings.N_PLUS_ONE_THRESHOLD)
@@ -1,18 +1,217 @@
+from decimal import Decimal, InvalidOperation
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
 from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import ListAPIView
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from core.async_views import async_read_view, json_response
+from core.instrumentation import TimedSerializerMixin, serializer_data
+from core.pagination import IdCursorPagination
 from core.permissions import IsAdminRole
 
-from .models import Product
+from .cache import (
+    aproduct_detail_cache_key,
+    aproduct_list_cache_key,
+    cached_json_response,
+    invalidate_catalog,
+    json_cache_entry,
+    json_entry_response,
+    product_detail_cache_key,
+    product_list_cache_key,
+)
+from .imports import IMPORT_FORMATS, ImportFileError, import_products, read_rows
+from .models import Product, ProductVariant, StockMovement
+from .search import AUTOCOMPLETE_LIMIT, autocomplete, reindex_products, search_products
 from rest_framework.permissions import AllowAny
-from .serializers import AdminProductSerializer, ProductSerializer
+from .serializers import AdminProductSerializer, ProductSerializer, StockMovementSerializer
+
+PRODUCT_FIELDS = set(ProductSerializer.Meta.fields)
+TRUE_VALUES = {"1", "true", "yes"}
+SEARCH_PAGE_SIZE = 24
+SEARCH_MAX_PAGE_SIZE = 100
+
+
+def _parse_list(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    return {item.strip() for item in value.split(",") if item.strip()}
+
+
+def _parse_int(params, name, default, maximum=None):
+    try:
+        value = int(params.get(name, default))
+    except (TypeError, ValueError):
+        raise ValidationError({"error": f"{name} must be a number"})
+    if value < 0:
+        raise ValidationError({"error": f"{name} must not be negative"})
+    return min(value, maximum) if maximum else value
+
+
+def _parse_price(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        price = Decimal(value)
+    except InvalidOperation:
+        raise ValidationError({"error": f"{name} must be a number"})
+    if not price.is_finite():
+        raise ValidationError({"error": f"{name} must be a number"})
+    return price
+
+
+def _requested_fields(params):
+    raw = params.get("fields")
+    if not raw:
+        return None
+
+    fields = {name.strip() for name in raw.split(",") if name.strip()}
+    if fields - PRODUCT_FIELDS:
+        raise ValidationError({"error": "Invalid fields", "allowed": sorted(PRODUCT_FIELDS)})
+    return fields | {"id"}
+
+
+def _product_queryset(fields):
+    queryset = Product.objects.all()
+    if fields is None or "variants" in fields:
+        queryset = queryset.prefetch_related("variants")
+    if fields is not None:
+        columns = fields - {"variants", "in_stock"}
+        if "in_stock" in fields:
+            columns.add("total_stock")
+        queryset = queryset.only(*columns)
+    return queryset
 
-class ProductViewSet(ReadOnlyModelViewSet):
+
+class ProductCursorPagination(IdCursorPagination):
+    ordering = "id"
+
+
+class ProductViewSet(TimedSerializerMixin, ReadOnlyModelViewSet):
     queryset = Product.objects.prefetch_related("variants")
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
+    pagination_class = ProductCursorPagination
+
+    def requested_fields(self):
+        return _requested_fields(self.request.query_params)
+
+    def filter_queryset(self, queryset):
+        if self.action != "list":
+            return queryset
+
+        params = self.request.query_params
+        category = params.get("category")
+        if category:
+            categories = {value.strip().upper() for value in category.split(",")}
+            allowed_categories = {choice[0] for choice in Product.CATEGORY_CHOICES}
+            if categories - allowed_categories:
+                raise ValidationError({"error": "Invalid category", "allowed": sorted(allowed_categories)})
+            queryset = queryset.filter(category__in=categories)
+
+        variant_filters = {}
+        min_price = _parse_price(params, "min_price")
+        max_price = _parse_price(params, "max_price")
+        if min_price is not None:
+            variant_filters["price__gte"] = min_price
+        if max_price is not None:
+            variant_filters["price__lte"] = max_price
+        in_stock = params.get("in_stock", "").lower() in TRUE_VALUES
+        if in_stock and not variant_filters:
+            queryset = queryset.filter(total_stock__gt=0)
+        elif in_stock:
+            variant_filters["stock__gt"] = 0
+
+        if variant_filters:
+            matching_variants = ProductVariant.objects.filter(product=OuterRef("pk"), **variant_filters)
+            queryset = queryset.filter(Exists(matching_variants))
+
+        return queryset
+
+    def get_queryset(self):
+        return _product_queryset(self.requested_fields())
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", self.requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    @action(detail=False)
+    def search(self, request):
+        params = request.query_params
+        category = _parse_list(params, "category")
+        count, page_ids, facets = search_products(
+            params.get("q", ""),
+            offset=_parse_int(params, "offset", 0),
+            limit=_parse_int(params, "limit", SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE),
+            category={value.upper() for value in category} if category else None,
+            size=_parse_list(params, "size"),
+            color=_parse_list(params, "color"),
+            min_price=_parse_price(params, "min_price"),
+            max_price=_parse_price(params, "max_price"),
+            in_stock=params.get("in_stock", "").lower() in TRUE_VALUES or None,
+        )
+
+        products = self.get_queryset().in_bulk(page_ids)
+        page = [products[product_id] for product_id in page_ids if product_id in products]
+        serializer = self.get_serializer(page, many=True)
+        return Response({"count": count, "results": serializer_data(serializer), "facets": facets})
+
+    @action(detail=False)
+    def autocomplete(self, request):
+        limit = _parse_int(request.query_params, "limit", AUTOCOMPLETE_LIMIT, AUTOCOMPLETE_LIMIT)
+        products, categories = autocomplete(request.query_params.get("q", ""), limit)
+        return Response({"products": products, "categories": categories})
+
+    def list(self, request, *args, **kwargs):
+        return cached_json_response(
+            request,
+            product_list_cache_key(request),
+            lambda: super(ProductViewSet, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_json_response(
+            request,
+            product_detail_cache_key(request, kwargs["pk"]),
+            lambda: super(ProductViewSet, self).retrieve(request, *args, **kwargs),
+        )
+
+
+async def _read_product_list(request, user):
+    entry = await cache.aget(await aproduct_list_cache_key(request))
+    if entry is None:
+        # Filtering and cursor pagination are DRF code; a miss renders and caches through the viewset.
+        return await sync_to_async(_product_list)(request)
+    return json_entry_response(request, entry)
+
+
+async def _read_product_detail(request, user, pk):
+    key = await aproduct_detail_cache_key(request, pk)
+    entry = await cache.aget(key)
+    if entry is None:
+        fields = _requested_fields(request.GET)
+        try:
+            product = await _product_queryset(fields).aget(pk=pk)
+        except Product.DoesNotExist:
+            return json_response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        entry = json_cache_entry(serializer_data(ProductSerializer(product, fields=fields)))
+        await cache.aset(key, entry, settings.CATALOG_CACHE_TIMEOUT)
+    return json_entry_response(request, entry)
+
+
+_product_list = ProductViewSet.as_view({"get": "list"})
+product_list_view = async_read_view(_read_product_list, _product_list)
+product_detail_view = async_read_view(_read_product_detail, ProductViewSet.as_view({"get": "retrieve"}))
 
 
 class AdminProductListCreateView(APIView):
@@ -20,13 +219,15 @@ class AdminProductListCreateView(APIView):
 
     def get(self, request):
         products = Product.objects.prefetch_related("variants").all().order_by("-id")
-        return Response(AdminProductSerializer(products, many=True).data)
+        return Response(serializer_data(AdminProductSerializer(products, many=True)))
 
     def post(self, request):
         serializer = AdminProductSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        product = serializer.save()
+        invalidate_catalog([product.id])
+        reindex_products([product.id])
+        return Response(serializer_data(serializer), status=status.HTTP_201_CREATED)
 
 
 class AdminProductDetailView(APIView):
@@ -46,12 +247,61 @@ class AdminProductDetailView(APIView):
         serializer = AdminProductSerializer(product, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        return Response(serializer.data)
+        invalidate_catalog([product.id])
+        reindex_products([product.id])
+        return Response(serializer_data(serializer))
 
     def delete(self, request, product_id):
         product = self.get_object(product_id)
         if not product:
             return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
 
+        # Reindex after the delete so the index re-reads the product as gone rather than re-adding it.
+        product_ids = [product.id]
         product.delete()
+        invalidate_catalog(product_ids)
+        reindex_products(product_ids)
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class AdminProductImportView(APIView):
+    permission_classes = [IsAdminRole]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "file is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        input_format = request.query_params.get("input") or upload.name.rsplit(".", 1)[-1].lower()
+        if input_format not in IMPORT_FORMATS:
+            return Response(
+                {"error": "Invalid input", "allowed": sorted(IMPORT_FORMATS)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        prune = request.query_params.get("prune", "true").lower() in TRUE_VALUES
+        try:
+            report = import_products(read_rows(upload.file, input_format), prune=prune)
+        except ImportFileError as exc:
+            return Response(
+                {"error": str(exc), "line": exc.line, "imported": exc.imported},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(report)
+
+
+class AdminStockMovementListView(TimedSerializerMixin, ListAPIView):
+    permission_classes = [IsAdminRole]
+    serializer_class = StockMovementSerializer
+    pagination_class = IdCursorPagination
+
+    def get_queryset(self):
+        movements = StockMovement.objects.filter(variant_id=self.kwargs["variant_id"])
+        kind = self.request.query_params.get("kind")
+        if kind:
+            kinds = {value.strip().upper() for value in kind.split(",")}
+            allowed_kinds = {choice[0] for choice in StockMovement.KIND_CHOICES}
+            if kinds - allowed_kinds:
+                raise ValidationError({"error": "Invalid kind", "allowed": sorted(allowed_kinds)})
+            movements = movements.filter(kind__in=kinds)
+        return movements
@@ -0,0 +1,52 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+READ_METHODS = {"GET", "HEAD"}
+
+
+def json_response(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type="application/json")
+
+
+def error_response(request, exc):
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+    response = json_response(data, status=exc.status_code)
+    if exc.status_code == 401:
+        response["WWW-Authenticate"] = api_settings.DEFAULT_AUTHENTICATION_CLASSES[0]().authenticate_header(request)
+    return response
+
+
+async def authenticate(request):
+    authenticators = [authentication_class() for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    user = await sync_to_async(getattr)(Request(request, authenticators=authenticators), "user")
+    return user if user.is_authenticated else None
+
+
+def async_read_view(read, fallback, login_required=False):
+    # Under WSGI every async view would pay for its own event loop, so the DRF view serves everything.
+    if not settings.ASYNC_VIEWS:
+        return fallback
+
+    # GET and HEAD run natively under ASGI; other methods keep going through the DRF view.
+    @csrf_exempt
+    async def view(request, *args, **kwargs):
+        if request.method not in READ_METHODS:
+            return await sync_to_async(fallback)(request, *args, **kwargs)
+
+        try:
+            user = await authenticate(request)
+            if login_required and user is None:
+                raise NotAuthenticated()
+            if user is not None:
+                request.user = user
+            return await read(request, user, *args, **kwargs)
+        except APIException as exc:
+            return error_response(request, exc)
+
+    return view
@@ -0,0 +1,251 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_IN_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)+\s*\)")
+
+# Connections are per thread, so async views query on connections the middleware never sees;
+# the recorder travels in a context variable instead, which sync_to_async copies into its threads.
+_current_recorder = ContextVar("query_recorder", default=None)
+
+
+class NPlusOneQueries(Exception):
+    pass
+
+
+def _sql_shape(sql):
+    # Django keeps values in params, so only variable-length IN lists need collapsing.
+    return _IN_LIST.sub("(%s, ...)", sql)
+
+
+class _QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        self.serialize_duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.shapes[_sql_shape(sql)] += 1
+
+    def repeated(self, threshold):
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+class _ViewStats:
+    def __init__(self):
+        self.statuses = Counter()
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.duration = 0.0
+        self.db_queries = 0
+        self.db_duration = 0.0
+        self.serialize_duration = 0.0
+        self.render_duration = 0.0
+        self.n_plus_one = 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = defaultdict(_ViewStats)
+
+    def observe(
+        self, view, method, status, duration, queries, db_duration, serialize_duration, render_duration, n_plus_one
+    ):
+        with self.lock:
+            stats = self.views[view]
+            stats.statuses[(method, status)] += 1
+            stats.count += 1
+            stats.duration += duration
+            stats.db_queries += queries
+            stats.db_duration += db_duration
+            stats.serialize_duration += serialize_duration
+            stats.render_duration += render_duration
+            stats.n_plus_one += n_plus_one
+            for position, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    stats.buckets[position] += 1
+
+    def render(self):
+        lines = [
+            "# TYPE http_requests_total counter",
+            "# TYPE http_request_duration_seconds histogram",
+            "# TYPE db_queries_total counter",
+            "# TYPE db_query_duration_seconds_total counter",
+            "# TYPE serializer_seconds_total counter",
+            "# TYPE response_render_seconds_total counter",
+            "# TYPE n_plus_one_requests_total counter",
+        ]
+        with self.lock:
+            for view, stats in sorted(self.views.items()):
+                label = f'view="{_escape(view)}"'
+                for (method, status), count in sorted(stats.statuses.items()):
+                    lines.append(f'http_requests_total{{{label},method="{method}",status="{status}"}} {count}')
+                for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                    lines.append(f'http_request_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'http_request_duration_seconds_bucket{{{label},le="+Inf"}} {stats.count}')
+                lines.append(f"http_request_duration_seconds_sum{{{label}}} {stats.duration:.6f}")
+                lines.append(f"http_request_duration_seconds_count{{{label}}} {stats.count}")
+                lines.append(f"db_queries_total{{{label}}} {stats.db_queries}")
+                lines.append(f"db_query_duration_seconds_total{{{label}}} {stats.db_duration:.6f}")
+                lines.append(f"serializer_seconds_total{{{label}}} {stats.serialize_duration:.6f}")
+                lines.append(f"response_render_seconds_total{{{label}}} {stats.render_duration:.6f}")
+                lines.append(f"n_plus_one_requests_total{{{label}}} {stats.n_plus_one}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+
+def _record_query(execute, sql, params, many, context):
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def _install_recorder(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(_install_recorder)
+
+
+def serializer_data(serializer):
+    # Views call this instead of serializer.data so to_representation time lands in the request's
+    # serialize timing; nested serializers run inside the outer call and are not counted twice.
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return serializer.data
+
+    started = time.perf_counter()
+    try:
+        return serializer.data
+    finally:
+        recorder.serialize_duration += time.perf_counter() - started
+
+
+class TimedSerializerMixin:
+    """List and retrieve for generic views, with the serializer timed through serializer_data."""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer_data(self.get_serializer(page, many=True)))
+        return Response(serializer_data(self.get_serializer(queryset, many=True)))
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(serializer_data(self.get_serializer(self.get_object())))
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        recorder = _QueryRecorder()
+        request._render_duration = 0.0
+        for connection in connections.all(initialized_only=True):
+            _install_recorder(connection)
+        token = _current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self._finish(request, response, recorder, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        recorder = _QueryRecorder()
+        request._render_duration = 0.0
+        token = _current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self._finish(request, response, recorder, time.perf_counter() - started)
+
+    def _finish(self, request, response, recorder, duration):
+        match = request.resolver_match
+        view = match.route if match else "unmatched"
+        repeated = recorder.repeated(settings.N_PLUS_ONE_THRESHOLD)
+        registry.observe(
+            view,
+            request.method,
+            response.status_code,
+            duration,
+            recorder.count,
+            recorder.duration,
+            recorder.serialize_duration,
+            request._render_duration,
+            bool(repeated),
+        )
+
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={recorder.duration * 1000:.2f};desc="{recorder.count} queries"',
+                f"serialize;dur={recorder.serialize_duration * 1000:.2f}",
+                f"render;dur={request._render_duration * 1000:.2f}",
+                f"total;dur={duration * 1000:.2f}",
+            ]
+        )
+
+        if repeated:
+            shape, count = repeated[0]
+            logger.warning("n_plus_one view=%s method=%s count=%s sql=%s", view, request.method, count, shape[:300])
+            if settings.N_PLUS_ONE_RAISE:
+                raise NPlusOneQueries(f"{view} ran the same query {count} times: {shape}")
+        return response
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._render_duration = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if not token or not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        raise Http404()
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4")
@@ -3,6 +3,7 @@ from dotenv import load_dotenv
 import os
 from datetime import timedelta
 import dj_database_url
+from corsheaders.defaults import default_headers
 BASE_DIR = Path(__file__).resolve().parent.parent
 env_path = BASE_DIR / ".env"
 load_dotenv(dotenv_path=env_path)
@@ -40,14 +41,16 @@ INSTALLED_APPS = [
     "apps.carts",
     "apps.orders",
     "apps.reviews",
+    "apps.analytics",
 ]
 
 AUTH_USER_MODEL = "accounts.User"
 
 MIDDLEWARE = [
+    "core.instrumentation.RequestMetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "core.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -56,7 +59,7 @@ MIDDLEWARE = [
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
-print("🚨 DATABASE_URL:", DATABASE_URL)
+CORS_ALLOW_HEADERS = (*default_headers, "x-guest-cart")
 if DATABASE_URL:
     # Railway / Postgres
     DATABASES = {
@@ -72,15 +75,48 @@ else:
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+            # A file rather than shared-cache memory, so threaded tests get real connections and lock waits.
+            "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
         }
     }
     
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    # Per-process cache; set REDIS_URL so all workers share catalog invalidation.
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "sentientshop",
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        }
+    }
+
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", 300))
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get("AUTH_USER_CACHE_TIMEOUT", 60))
+STOCK_RESERVATION_MINUTES = int(os.environ.get("STOCK_RESERVATION_MINUTES", 15))
+
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("N_PLUS_ONE_THRESHOLD", 10))
+N_PLUS_ONE_RAISE = os.environ.get("N_PLUS_ONE_RAISE", "False") == "True"
+# The test runner turns N_PLUS_ONE_RAISE on for every test.
+TEST_RUNNER = "core.testing.TestRunner"
+
+# Set by core/asgi.py; routes the hot read endpoints to their async views.
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "False") == "True"
+
 STATIC_URL = "/static/"
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.accounts.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",
@@ -108,7 +144,7 @@ TEMPLATES = [
 ]
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.accounts.authentication.CachedJWTAuthentication",
     ),
 }
 
@@ -116,3 +152,18 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "keyvalue": {"format": "%(asctime)s level=%(levelname)s logger=%(name)s %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "keyvalue"},
+    },
+    "loggers": {
+        "apps": {"handlers": ["console"], "level": os.environ.get("APP_LOG_LEVEL", "INFO")},
+        "core": {"handlers": ["console"], "level": os.environ.get("APP_LOG_LEVEL", "INFO")},
+    },
+}
@@ -0,0 +1,29 @@
+import time
+
+from django.db import OperationalError
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def retry_locked(func, attempts=200, delay=0.005):
+    # SQLite answers a write conflict with "database is locked" instead of waiting; Postgres blocks and never does.
+    for _ in range(attempts):
+        try:
+            return func()
+        except OperationalError as exc:
+            if "locked" not in str(exc):
+                raise
+            time.sleep(delay)
+    raise AssertionError("database stayed locked")
+
+
+class TestRunner(DiscoverRunner):
+    # Production only logs a repeated query; under manage.py test the request fails so the N+1 cannot land.
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._n_plus_one_raise = override_settings(N_PLUS_ONE_RAISE=True)
+        self._n_plus_one_raise.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._n_plus_one_raise.disable()
+        super().teardown_test_environment(**kwargs)
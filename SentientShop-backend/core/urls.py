@@ -1,17 +1,32 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from apps.store.views import AdminProductDetailView, AdminProductListCreateView, ProductViewSet
+
+from apps.store.views import (
+    AdminProductDetailView,
+    AdminProductImportView,
+    AdminProductListCreateView,
+    AdminStockMovementListView,
+    ProductViewSet,
+    product_detail_view,
+    product_list_view,
+)
+from core.instrumentation import metrics_view
 
 router = DefaultRouter()
 router.register("products", ProductViewSet)
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view),
+    path("api/products/", product_list_view),
+    path("api/products/<int:pk>/", product_detail_view),
     path("api/", include(router.urls)),
     path("api/", include("apps.reviews.urls")),
     path("api/admin/products/", AdminProductListCreateView.as_view()),
+    path("api/admin/products/import/", AdminProductImportView.as_view()),
     path("api/admin/products/<int:product_id>/", AdminProductDetailView.as_view()),
+    path("api/admin/variants/<int:variant_id>/movements/", AdminStockMovementListView.as_view()),
     path("api/auth/", include("apps.accounts.urls")),
     path("api/cart/", include("apps.carts.urls")),
     path("api/orders/", include("apps.orders.urls")),
@@ -1,5 +1,7 @@
 import axios from "axios";
 
+import { getGuestCartToken } from "../utils/cart";
+
 const api = axios.create({
     baseURL: import.meta.env.VITE_API_BASE_URL + "/api",
 });
@@ -9,6 +11,8 @@ api.interceptors.request.use((config) => {
 
     if (token) {
         config.headers.Authorization = `Bearer ${token}`;
+    } else if (getGuestCartToken()) {
+        config.headers["X-Guest-Cart"] = getGuestCartToken();
     }
 
     return config;
@@ -6,6 +6,13 @@ import api from "../api/clients";
 const ORDER_STATUS_OPTIONS = ["PENDING", "PAID", "SHIPPED", "DELIVERED", "CANCELLED"];
 const USER_ROLE_OPTIONS = ["CUSTOMER", "ADMIN", "SUPPORT"];
 const PAGE_SIZE = 8;
+const RECENT_PREVIEW_SIZE = 5;
+const emptyOrderFilters = {
+  status: "",
+  start: "",
+  end: "",
+  email: "",
+};
 const newVariantTemplate = {
   id: null,
   size: "",
@@ -26,7 +33,12 @@ const emptyProductForm = {
 export default function AdminDashboard() {
   const [dashboard, setDashboard] = useState(null);
   const [products, setProducts] = useState([]);
+  const [orders, setOrders] = useState([]);
+  const [nextOrders, setNextOrders] = useState(null);
+  const [orderFilters, setOrderFilters] = useState(emptyOrderFilters);
   const [users, setUsers] = useState([]);
+  const [nextUsers, setNextUsers] = useState(null);
+  const [userQuery, setUserQuery] = useState("");
   const [error, setError] = useState("");
   const [loading, setLoading] = useState(true);
   const [productForm, setProductForm] = useState(emptyProductForm);
@@ -40,17 +52,29 @@ export default function AdminDashboard() {
   const [productPage, setProductPage] = useState(1);
   const [userPage, setUserPage] = useState(1);
 
+  const orderParams = () => ({
+    status: orderFilters.status || undefined,
+    start: orderFilters.start || undefined,
+    end: orderFilters.end || undefined,
+    email: orderFilters.email.trim() || undefined,
+    page_size: 100,
+  });
+
   const fetchData = async () => {
     setLoading(true);
     try {
-      const [dashboardRes, productsRes, usersRes] = await Promise.all([
+      const [dashboardRes, ordersRes, productsRes, usersRes] = await Promise.all([
         api.get("/orders/admin/dashboard/"),
+        api.get("/orders/admin/orders/", { params: orderParams() }),
         api.get("/admin/products/"),
-        api.get("/auth/admin/users/"),
+        api.get("/auth/admin/users/", { params: { q: userQuery || undefined, page_size: 100 } }),
       ]);
       setDashboard(dashboardRes.data);
+      setOrders(ordersRes.data.results);
+      setNextOrders(ordersRes.data.next);
       setProducts(productsRes.data);
-      setUsers(usersRes.data);
+      setUsers(usersRes.data.results);
+      setNextUsers(usersRes.data.next);
       setError("");
     } catch {
       setError("Admin access required");
@@ -63,6 +87,50 @@ export default function AdminDashboard() {
     fetchData();
   }, []);
 
+  const filterOrders = async (event) => {
+    event.preventDefault();
+    try {
+      const res = await api.get("/orders/admin/orders/", { params: orderParams() });
+      setOrders(res.data.results);
+      setNextOrders(res.data.next);
+      setOrderPage(1);
+    } catch (err) {
+      setError(err.response?.data?.error || "Failed to load orders");
+    }
+  };
+
+  const loadMoreOrders = async () => {
+    try {
+      const res = await api.get(nextOrders);
+      setOrders((prev) => [...prev, ...res.data.results]);
+      setNextOrders(res.data.next);
+    } catch {
+      setError("Failed to load orders");
+    }
+  };
+
+  const searchUsers = async (event) => {
+    event.preventDefault();
+    try {
+      const res = await api.get("/auth/admin/users/", { params: { q: userQuery || undefined, page_size: 100 } });
+      setUsers(res.data.results);
+      setNextUsers(res.data.next);
+      setUserPage(1);
+    } catch {
+      setError("Failed to load users");
+    }
+  };
+
+  const loadMoreUsers = async () => {
+    try {
+      const res = await api.get(nextUsers);
+      setUsers((prev) => [...prev, ...res.data.results]);
+      setNextUsers(res.data.next);
+    } catch {
+      setError("Failed to load users");
+    }
+  };
+
   const chartRows = useMemo(() => {
     if (!dashboard?.charts) {
       return [];
@@ -82,8 +150,8 @@ export default function AdminDashboard() {
 
   const pagedOrders = useMemo(() => {
     const start = (orderPage - 1) * PAGE_SIZE;
-    return dashboard?.orders?.slice(start, start + PAGE_SIZE) || [];
-  }, [dashboard, orderPage]);
+    return orders.slice(start, start + PAGE_SIZE);
+  }, [orders, orderPage]);
 
   const pagedProducts = useMemo(() => {
     const start = (productPage - 1) * PAGE_SIZE;
@@ -96,6 +164,7 @@ export default function AdminDashboard() {
   }, [users, userPage]);
 
   const updateOrderStatus = async (orderId, status) => {
+    setOrders((prev) => prev.map((order) => (order.id === orderId ? { ...order, status } : order)));
     setDashboard((prev) => ({
       ...prev,
       orders: prev.orders.map((order) => (order.id === orderId ? { ...order, status } : order)),
@@ -274,6 +343,19 @@ export default function AdminDashboard() {
               </div>
             ))}
           </div>
+          <h3 className="mb-2 mt-4 text-sm font-semibold text-slate-700">Recent Orders</h3>
+          <ul className="divide-y divide-slate-100 text-sm">
+            {dashboard.orders.slice(0, RECENT_PREVIEW_SIZE).map((order) => (
+              <li key={order.id} className="flex justify-between py-1 text-slate-700">
+                <span>
+                  #{order.id} · {order.user}
+                </span>
+                <span>
+                  Rs. {order.total} · {order.status}
+                </span>
+              </li>
+            ))}
+          </ul>
             </>
           ) : null}
         </section>
@@ -286,6 +368,42 @@ export default function AdminDashboard() {
           />
           {!collapsed.orders ? (
             <>
+          <form onSubmit={filterOrders} className="mb-3 flex flex-wrap gap-2">
+            <select
+              value={orderFilters.status}
+              onChange={(e) => setOrderFilters((prev) => ({ ...prev, status: e.target.value }))}
+              className="rounded border border-slate-300 px-2 py-1 text-sm text-slate-700"
+            >
+              <option value="">All statuses</option>
+              {ORDER_STATUS_OPTIONS.map((status) => (
+                <option key={status} value={status}>
+                  {status}
+                </option>
+              ))}
+            </select>
+            <input
+              type="date"
+              value={orderFilters.start}
+              onChange={(e) => setOrderFilters((prev) => ({ ...prev, start: e.target.value }))}
+              className="rounded border border-slate-300 px-2 py-1 text-sm"
+            />
+            <input
+              type="date"
+              value={orderFilters.end}
+              onChange={(e) => setOrderFilters((prev) => ({ ...prev, end: e.target.value }))}
+              className="rounded border border-slate-300 px-2 py-1 text-sm"
+            />
+            <input
+              type="email"
+              value={orderFilters.email}
+              onChange={(e) => setOrderFilters((prev) => ({ ...prev, email: e.target.value }))}
+              placeholder="Customer email"
+              className="w-full max-w-xs rounded border border-slate-300 px-3 py-1 text-sm"
+            />
+            <button type="submit" className="rounded border border-slate-300 px-3 py-1 text-sm text-slate-700">
+              Filter
+            </button>
+          </form>
           <table className="w-full min-w-[700px]">
             <thead>
               <tr className="border-b border-slate-200 bg-slate-50 text-left text-sm text-slate-600">
@@ -321,9 +439,16 @@ export default function AdminDashboard() {
           <PaginationControls
             page={orderPage}
             setPage={setOrderPage}
-            totalItems={dashboard.orders.length}
+            totalItems={orders.length}
             pageSize={PAGE_SIZE}
           />
+          {nextOrders ? (
+            <div className="mt-2 flex justify-end">
+              <button onClick={loadMoreOrders} className="rounded border border-slate-300 px-3 py-1 text-sm text-slate-700">
+                Load more orders
+              </button>
+            </div>
+          ) : null}
             </>
           ) : null}
         </section>
@@ -475,6 +600,17 @@ export default function AdminDashboard() {
           />
           {!collapsed.users ? (
             <>
+          <form onSubmit={searchUsers} className="mb-3 flex gap-2">
+            <input
+              value={userQuery}
+              onChange={(e) => setUserQuery(e.target.value)}
+              placeholder="Search by email or username"
+              className="w-full max-w-sm rounded border border-slate-300 px-3 py-1 text-sm"
+            />
+            <button type="submit" className="rounded border border-slate-300 px-3 py-1 text-sm text-slate-700">
+              Search
+            </button>
+          </form>
           <table className="w-full min-w-[700px]">
             <thead>
               <tr className="border-b border-slate-200 bg-slate-50 text-left text-sm text-slate-600">
@@ -531,6 +667,13 @@ export default function AdminDashboard() {
             totalItems={users.length}
             pageSize={PAGE_SIZE}
           />
+          {nextUsers ? (
+            <div className="mt-2 flex justify-end">
+              <button onClick={loadMoreUsers} className="rounded border border-slate-300 px-3 py-1 text-sm text-slate-700">
+                Load more users
+              </button>
+            </div>
+          ) : null}
             </>
           ) : null}
         </section>
@@ -7,7 +7,7 @@ import PaymentForm from "../components/PaymentForm";
 import api from "../api/clients";
 import { SkeletonRow } from "../components/LoadingUI";
 import { stripePromise } from "../api/stripe";
-import { getGuestCart, setGuestCart } from "../utils/cart";
+import { saveGuestCart } from "../utils/cart";
 
 export default function Cart() {
   const [items, setItems] = useState([]);
@@ -15,19 +15,15 @@ export default function Cart() {
   const [loading, setLoading] = useState(true);
 
   const fetchCart = async () => {
-    const token = localStorage.getItem("token");
-
-    if (!token) {
-      setItems(getGuestCart());
-      setIsGuest(true);
-      setLoading(false);
-      return;
-    }
+    const guest = !localStorage.getItem("token");
 
     try {
       const res = await api.get("/cart/");
-      setItems(res.data);
-      setIsGuest(false);
+      if (guest) {
+        saveGuestCart(res.data);
+      }
+      setItems(res.data.items);
+      setIsGuest(guest);
     } catch {
       setItems([]);
     } finally {
@@ -44,27 +40,15 @@ export default function Cart() {
       return;
     }
 
-    if (isGuest) {
-      const updated = items.map((item, idx) => (idx === itemId ? { ...item, quantity: newQty } : item));
-      setItems(updated);
-      setGuestCart(updated);
-      return;
-    }
-
-    await api.patch(`/cart/${itemId}/`, { quantity: newQty });
+    const res = await api.patch(`/cart/${itemId}/`, { quantity: newQty });
+    saveGuestCart(res.data);
     fetchCart();
     toast.success("Cart updated");
   };
 
   const removeItem = async (itemId) => {
-    if (isGuest) {
-      const updated = items.filter((_, idx) => idx !== itemId);
-      setItems(updated);
-      setGuestCart(updated);
-      return;
-    }
-
-    await api.delete(`/cart/${itemId}/`);
+    const res = await api.delete(`/cart/${itemId}/`);
+    saveGuestCart(res.data);
     fetchCart();
     toast.success("Item removed from cart");
   };
@@ -96,9 +80,9 @@ export default function Cart() {
           </div>
         ) : (
           <div className="space-y-4">
-            {items.map((item, index) => (
+            {items.map((item) => (
               <section
-                key={isGuest ? index : item.id}
+                key={item.id}
                 className="flex flex-wrap items-center justify-between gap-4 rounded-2xl border border-slate-200 bg-white p-4 shadow-sm"
               >
                 <div>
@@ -111,7 +95,7 @@ export default function Cart() {
 
                 <div className="flex items-center gap-2">
                   <button
-                    onClick={() => updateQuantity(isGuest ? index : item.id, item.quantity - 1)}
+                    onClick={() => updateQuantity(item.id, item.quantity - 1)}
                     className="rounded border border-slate-300 px-3 py-1 text-slate-700 hover:bg-slate-100"
                   >
                     -
@@ -120,14 +104,14 @@ export default function Cart() {
                   <span className="w-8 text-center font-semibold">{item.quantity}</span>
 
                   <button
-                    onClick={() => updateQuantity(isGuest ? index : item.id, item.quantity + 1)}
+                    onClick={() => updateQuantity(item.id, item.quantity + 1)}
                     className="rounded border border-slate-300 px-3 py-1 text-slate-700 hover:bg-slate-100"
                   >
                     +
                   </button>
 
                   <button
-                    onClick={() => removeItem(isGuest ? index : item.id)}
+                    onClick={() => removeItem(item.id)}
                     className="ml-2 rounded border border-red-200 px-3 py-1 text-red-600 hover:bg-red-50"
                   >
                     Remove
@@ -2,7 +2,7 @@ import { useState } from "react";
 import { Link, useNavigate } from "react-router-dom";
 
 import api from "../api/clients";
-import { mergeGuestCart } from "../utils/cart";
+import { clearGuestCart } from "../utils/cart";
 
 export default function Login() {
   const [email, setEmail] = useState("");
@@ -26,7 +26,7 @@ export default function Login() {
         email: res.data.email,
       }));
 
-      await mergeGuestCart();
+      clearGuestCart();
       const isAdmin = Boolean(res.data?.is_staff || res.data?.is_superuser || res.data?.role === "ADMIN");
       navigate(isAdmin ? "/admin" : "/cart");
     } catch (err) {
@@ -4,7 +4,7 @@ import toast from "react-hot-toast";
 
 import api from "../api/clients";
 import { SkeletonCard } from "../components/LoadingUI";
-import { addToGuestCart } from "../utils/cart";
+import { saveGuestCart } from "../utils/cart";
 import { getProductImage } from "../utils/productImages";
 
 export default function ProductDetails() {
@@ -13,6 +13,9 @@ export default function ProductDetails() {
   const [loading, setLoading] = useState(true);
   const [selectedVariantId, setSelectedVariantId] = useState(null);
   const [reviews, setReviews] = useState([]);
+  const [nextReviews, setNextReviews] = useState(null);
+  const [reviewSummary, setReviewSummary] = useState(null);
+  const [purchased, setPurchased] = useState(false);
   const [reviewDraft, setReviewDraft] = useState({ rating: "5", comment: "" });
   const [message, setMessage] = useState("");
   const [reviewMessage, setReviewMessage] = useState("");
@@ -32,17 +35,41 @@ export default function ProductDetails() {
 
   const fetchReviews = async () => {
     try {
-      const res = await api.get(`/products/${productId}/reviews/`);
-      setReviews(res.data);
+      const [res, summary] = await Promise.all([
+        api.get(`/products/${productId}/reviews/`),
+        api.get(`/products/${productId}/reviews/summary/`),
+      ]);
+      setReviews(res.data.results);
+      setNextReviews(res.data.next);
+      setReviewSummary(summary.data);
     } catch {
       setReviews([]);
+      setNextReviews(null);
+      setReviewSummary(null);
     }
   };
 
+  const loadMoreReviews = () => {
+    api.get(nextReviews).then((res) => {
+      setReviews((current) => [...current, ...res.data.results]);
+      setNextReviews(res.data.next);
+    });
+  };
+
   useEffect(() => {
     fetchReviews();
   }, [productId]);
 
+  useEffect(() => {
+    if (!token) {
+      return;
+    }
+    api
+      .get("/orders/purchased/", { params: { products: productId } })
+      .then((res) => setPurchased(res.data.purchased.includes(Number(productId))))
+      .catch(() => setPurchased(false));
+  }, [productId, token]);
+
   const selectedVariant = useMemo(
     () => product?.variants?.find((variant) => variant.id === selectedVariantId),
     [product, selectedVariantId]
@@ -53,20 +80,12 @@ export default function ProductDetails() {
       return;
     }
     try {
-      await api.post("/cart/", { variant: selectedVariant.id, quantity: 1 });
-      setMessage("Item added to your cart.");
+      const res = await api.post("/cart/", { variant: selectedVariant.id, quantity: 1 });
+      saveGuestCart(res.data);
+      setMessage(token ? "Item added to your cart." : "Item added to guest cart. Login to sync it.");
       toast.success("Item added to cart");
     } catch {
-      addToGuestCart({
-        variant_id: selectedVariant.id,
-        product: product.name,
-        size: selectedVariant.size,
-        color: selectedVariant.color,
-        price: selectedVariant.price,
-        quantity: 1,
-      });
-      setMessage("Item added to guest cart. Login to sync it.");
-      toast.success("Item added to cart");
+      setMessage("Could not add this item to your cart.");
     }
     setTimeout(() => setMessage(""), 2400);
   };
@@ -114,6 +133,11 @@ export default function ProductDetails() {
           </div>
           <div>
             <h1 className="text-2xl font-black text-slate-900">{product.name}</h1>
+            {purchased ? (
+              <span className="mt-1 inline-block rounded bg-emerald-100 px-2 py-0.5 text-xs font-semibold text-emerald-800">
+                You bought this
+              </span>
+            ) : null}
             <p className="mt-2 text-slate-600">{product.description}</p>
 
             <div className="mt-5 rounded-xl border border-slate-200 bg-slate-50 p-3">
@@ -144,6 +168,18 @@ export default function ProductDetails() {
 
         <section className="rounded-2xl border border-slate-200 bg-white p-5 shadow-sm">
           <h2 className="text-xl font-bold text-slate-900">Reviews</h2>
+          {reviewSummary?.count ? (
+            <div className="mt-2 text-sm text-slate-600">
+              <p className="font-semibold text-slate-800">
+                {reviewSummary.average}/5 from {reviewSummary.count} reviews
+              </p>
+              {[5, 4, 3, 2, 1].map((rating) => (
+                <p key={rating}>
+                  {rating} Star: {reviewSummary.histogram[rating]}
+                </p>
+              ))}
+            </div>
+          ) : null}
           <div className="mt-3 space-y-2">
             {reviews.length ? (
               reviews.map((review) => (
@@ -157,6 +193,11 @@ export default function ProductDetails() {
             ) : (
               <p className="text-sm text-slate-500">No reviews yet.</p>
             )}
+            {nextReviews ? (
+              <button onClick={loadMoreReviews} className="rounded border border-slate-300 px-3 py-1 text-sm text-slate-700">
+                Load more reviews
+              </button>
+            ) : null}
           </div>
 
           {token ? (
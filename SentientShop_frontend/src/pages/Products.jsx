@@ -1,4 +1,4 @@
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useState } from "react";
 import { Link, useNavigate, useParams } from "react-router-dom";
 
 import api from "../api/clients";
@@ -12,6 +12,8 @@ const CATEGORIES = [
   { slug: "mobiles", key: "MOBILES", label: "Mobiles", icon: "M" },
 ];
 
+const SEARCH_DEBOUNCE_MS = 300;
+
 const CATEGORY_BY_SLUG = Object.fromEntries(CATEGORIES.map((category) => [category.slug, category]));
 
 const CATEGORY_BANNERS = {
@@ -25,20 +27,84 @@ export default function Products() {
   const [products, setProducts] = useState([]);
   const [loading, setLoading] = useState(true);
   const [search, setSearch] = useState("");
+  const [query, setQuery] = useState("");
   const [maxPrice, setMaxPrice] = useState("");
   const [inStockOnly, setInStockOnly] = useState(false);
   const { categorySlug } = useParams();
   const navigate = useNavigate();
   const activeCategory = categorySlug ? CATEGORY_BY_SLUG[categorySlug] : null;
 
+  const [nextPage, setNextPage] = useState(null);
+  const [purchasedIds, setPurchasedIds] = useState(new Set());
+  const token = localStorage.getItem("token");
+
+  useEffect(() => {
+    // Search once typing pauses instead of on every keystroke.
+    const timer = setTimeout(() => setQuery(search.trim()), SEARCH_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [search]);
+
   useEffect(() => {
+    const params = {};
+    if (activeCategory) {
+      params.category = activeCategory.key;
+    }
+    if (maxPrice) {
+      params.max_price = maxPrice;
+    }
+    if (inStockOnly) {
+      params.in_stock = 1;
+    }
+
+    if (query) {
+      params.q = query;
+    }
+
+    let stale = false;
     setLoading(true);
     api
-      .get("/products/")
-      .then((res) => setProducts(res.data))
-      .catch(() => setProducts([]))
-      .finally(() => setLoading(false));
-  }, []);
+      .get(query ? "/products/search/" : "/products/", { params })
+      .then((res) => {
+        if (stale) {
+          return;
+        }
+        setProducts(res.data.results);
+        setNextPage(res.data.next || null);
+      })
+      .catch(() => {
+        if (stale) {
+          return;
+        }
+        setProducts([]);
+        setNextPage(null);
+      })
+      .finally(() => {
+        if (!stale) {
+          setLoading(false);
+        }
+      });
+    return () => {
+      stale = true;
+    };
+  }, [activeCategory, maxPrice, inStockOnly, query]);
+
+  useEffect(() => {
+    if (!token || !products.length) {
+      return;
+    }
+    const ids = products.slice(-100).map((product) => product.id);
+    api
+      .get("/orders/purchased/", { params: { products: ids.join(",") } })
+      .then((res) => setPurchasedIds((current) => new Set([...current, ...res.data.purchased])))
+      .catch(() => {});
+  }, [products, token]);
+
+  const loadMore = () => {
+    api.get(nextPage).then((res) => {
+      setProducts((current) => [...current, ...res.data.results]);
+      setNextPage(res.data.next);
+    });
+  };
 
   useEffect(() => {
     if (categorySlug && !CATEGORY_BY_SLUG[categorySlug]) {
@@ -46,21 +112,6 @@ export default function Products() {
     }
   }, [categorySlug, navigate]);
 
-  const filteredProducts = useMemo(() => {
-    const normalizedSearch = search.trim().toLowerCase();
-    return products
-      .filter((product) => (!activeCategory ? true : product.category === activeCategory.key))
-      .filter((product) => (normalizedSearch ? product.name.toLowerCase().includes(normalizedSearch) : true))
-      .filter((product) => {
-        if (!maxPrice) {
-          return true;
-        }
-        const floorPrice = Math.min(...product.variants.map((variant) => Number(variant.price)));
-        return floorPrice <= Number(maxPrice);
-      })
-      .filter((product) => (inStockOnly ? product.variants.some((variant) => Number(variant.stock) > 0) : true));
-  }, [products, activeCategory, search, maxPrice, inStockOnly]);
-
   return (
     <div className="min-h-screen bg-gradient-to-br from-slate-100 via-stone-100 to-slate-200 px-4 py-10">
       <div className="mx-auto max-w-6xl">
@@ -150,13 +201,13 @@ export default function Products() {
               <SkeletonCard key={idx} />
             ))}
           </div>
-        ) : !filteredProducts.length ? (
+        ) : !products.length ? (
           <div className="rounded-2xl border border-dashed border-slate-300 bg-white p-8 text-center text-slate-600">
             No products found. Try a different filter or category.
           </div>
         ) : (
           <div className="grid gap-4 md:grid-cols-2 lg:grid-cols-3">
-            {filteredProducts.map((product) => (
+            {products.map((product) => (
               <section key={product.id} className="overflow-hidden rounded-2xl border border-slate-200 bg-white shadow-sm">
                 <div className="h-44 w-full overflow-hidden">
                   <img
@@ -167,6 +218,11 @@ export default function Products() {
                 </div>
                 <div className="p-4">
                   <h2 className="text-lg font-bold text-slate-900">{product.name}</h2>
+                  {purchasedIds.has(product.id) ? (
+                    <span className="rounded bg-emerald-100 px-2 py-0.5 text-xs font-semibold text-emerald-800">
+                      You bought this
+                    </span>
+                  ) : null}
                   <p className="mt-1 text-sm text-slate-600">{product.description}</p>
                   <p className="mt-2 text-sm font-semibold text-slate-700">
                     {product.variants.length} variants available
@@ -182,6 +238,17 @@ export default function Products() {
             ))}
           </div>
         )}
+
+        {!loading && nextPage && (
+          <div className="mt-6 text-center">
+            <button
+              onClick={loadMore}
+              className="rounded-lg border border-slate-300 bg-white px-4 py-2 text-sm font-semibold text-slate-700 hover:bg-slate-100"
+            >
+              Load more
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
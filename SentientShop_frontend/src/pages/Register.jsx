@@ -2,7 +2,7 @@ import { useState } from "react";
 import { Link, useNavigate } from "react-router-dom";
 
 import api from "../api/clients";
-import { mergeGuestCart } from "../utils/cart";
+import { clearGuestCart } from "../utils/cart";
 
 export default function Register() {
   const [email, setEmail] = useState("");
@@ -20,7 +20,7 @@ export default function Register() {
       const res = await api.post("/auth/register/", { email, password });
       localStorage.setItem("token", res.data.access);
 
-      await mergeGuestCart();
+      clearGuestCart();
       navigate("/cart");
     } catch (err) {
       const message = err.response?.data?.email?.[0] || "Registration failed. Try another email.";